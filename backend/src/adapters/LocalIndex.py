@@ -0,0 +1,73 @@
+import logging
+import os
+from contextlib import contextmanager
+
+from common.embeddings import embed_query
+from common.local_index import LOCAL_INDEX, LocalIndex
+from common.stage_timings import RETRIEVAL_TIMINGS
+
+logger = logging.getLogger(__name__)
+
+# Weight of the vector side in the hybrid fusion, Weaviate's default
+HYBRID_ALPHA = float(os.getenv("LOCAL_INDEX_ALPHA", 0.75))
+# Same candidate depth and result size as the Weaviate backend
+RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", 50))
+RETRIEVAL_LIMIT = int(os.getenv("RETRIEVAL_LIMIT", 10))
+
+
+class LocalIndex_Adapter:
+    """
+    In-process stand-in for Weaviate_Adapter that answers remove_dup_and_get_id from collections
+    exported by jobs/export_local_index.py. Only the query is embedded remotely; when that fails
+    the keyword side is used alone. There is no reranker, the fused score is returned instead.
+    """
+
+    def __init__(self, index: LocalIndex = LOCAL_INDEX):
+        self.index = index
+
+    def connect(self):
+        pass
+
+    def close(self, healthy: bool = True):
+        pass
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    def _embed(self, message):
+        try:
+            return embed_query(message)
+        except Exception as e:
+            logger.warning(f"Query embedding failed, using keyword search only: {e}")
+            return None
+
+    def remove_dup_and_get_id(
+        self, collection_name, property_name, message, bridge_name, id_property, query_vector=None, deadline=None
+    ):
+        """
+        Helper function to fetch, process, and deduplicate recommendations. Without a reranker
+        the deadline is not needed, it is accepted for interface compatibility.
+        """
+        collection = self.index.get(collection_name)
+        if query_vector is None:
+            query_vector = self._embed(message)
+        with RETRIEVAL_TIMINGS.time("candidates"):
+            results = collection.hybrid(message, query_vector, RETRIEVAL_CANDIDATES, alpha=HYBRID_ALPHA)
+
+        seen = set()
+        response_json = []
+        for properties, score in results:
+            if len(response_json) == RETRIEVAL_LIMIT:
+                break
+            key = (properties.get(property_name), properties.get("latitude"), properties.get("longitude"))
+            if key in seen:
+                continue
+            seen.add(key)
+
+            entry = {**properties, "score": score}
+            if entry.get(id_property):
+                entry["id"] = entry[id_property]
+            response_json.append(entry)
+
+        return response_json
@@ -1,15 +1,70 @@
+import logging
+import math
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Literal, Tuple
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from common.concurrency import SingleFlight, TokenBucket
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Matrix API coordinate limit per request
+MAX_MATRIX_COORDINATES = 25
+MAX_MATRIX_COORDINATES_TRAFFIC = 10
+
+# (connect, read) timeout in seconds
+REQUEST_TIMEOUT = (3.05, 30)
+
+# Longest Retry-After of a 429 response that is waited out before the next attempt
+MAX_RETRY_AFTER = 30
+
+
+def matrix_coordinate_limit(profile: str) -> int:
+    return MAX_MATRIX_COORDINATES_TRAFFIC if profile == "mapbox/driving-traffic" else MAX_MATRIX_COORDINATES
+
+
+def tile_shape(count_sources: int, count_destinations: int, limit: int) -> Tuple[int, int]:
+    """
+    Picks how many sources and destinations go into each tile so that a tile never exceeds
+    the coordinate limit and the number of tiles is minimal.
+    """
+    best = None
+    for tile_sources in range(1, limit):
+        tile_destinations = limit - tile_sources
+        tiles = math.ceil(count_sources / tile_sources) * math.ceil(count_destinations / tile_destinations)
+        if best is None or tiles < best[0]:
+            best = (tiles, min(tile_sources, count_sources), min(tile_destinations, count_destinations))
+    return best[1], best[2]
+
+# Concurrent solves asking for the same matrix share one HTTP call, across every MapBox instance
+MATRIX_SINGLE_FLIGHT = SingleFlight()
+
 class MapBox:
-    def __init__(self):
+    def __init__(self, max_workers: int = 4, max_retries: int = 2, requests_per_minute: int | None = None):
         self.MAPBOX_ACCESS_TOKEN = os.getenv("MAPBOX_API_KEY")
-        pass
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+
+        # Keep-alive connection pool. Only connection errors are retried here, 429/5xx responses
+        # are retried by _fetch_tile so that every attempt takes a rate limiter token
+        self.session = requests.Session()
+        retry = Retry(total=3, read=0, status=0, other=0, backoff_factor=0.5, allowed_methods=("GET",))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers * 2, max_retries=retry)
+        self.session.mount("https://", adapter)
+
+        # Matrix API quota, 60 requests per minute on the default plan
+        requests_per_minute = requests_per_minute or int(os.getenv("MAPBOX_MATRIX_REQUESTS_PER_MINUTE", 60))
+        self.rate_limiter = TokenBucket(rate=requests_per_minute / 60, capacity=max(1, requests_per_minute // 6))
+
+        self.single_flight = MATRIX_SINGLE_FLIGHT
     
     def fetch_matrix_api(self, 
         profile: Literal["mapbox/driving", "mapbox/walking", "mapbox/cycling", "mapbox/driving-traffic"], 
@@ -43,9 +98,131 @@ class MapBox:
             "fallback_speed": default_speed,
         }
         
-        response = requests.get(request_url, params=params)
+        key = (request_url, annotations, sources_str, destinations_str, approaches, default_speed)
+        return self.single_flight.do(key, lambda: self._get_durations(request_url, params))
+
+    def _get_durations(self, request_url, params):
+        self.rate_limiter.acquire()
+        response = self.session.get(request_url, params=params, timeout=REQUEST_TIMEOUT)
+
+        if response.status_code == 429:
+            # Wait out the quota window before _fetch_tile's next attempt takes another token
+            retry_after = response.headers.get("Retry-After", "")
+            logger.warning(f"MapBox matrix request was rate limited, Retry-After: {retry_after or 'unset'}.")
+            time.sleep(min(float(retry_after), MAX_RETRY_AFTER) if retry_after.isdigit() else 0)
+            return None
 
         data = response.json()
         durations = data.get("durations")
+        if durations is None:
+            logger.warning(f"MapBox matrix request failed with status {response.status_code}: {data.get('message')}")
 
         return durations
+
+    def _fetch_tile(self, profile, annotations, approache, default_speed, source_coords, destination_coords):
+        coords = list(source_coords) + list(destination_coords)
+        sources = list(range(len(source_coords)))
+        destinations = list(range(len(source_coords), len(coords)))
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                durations = self.fetch_matrix_api(
+                    profile, annotations, approache, default_speed, coords, sources, destinations
+                )
+                if durations is not None:
+                    return durations
+                logger.warning(f"MapBox matrix tile returned no durations (attempt {attempt + 1}).")
+            except Exception as e:
+                logger.warning(f"MapBox matrix tile failed (attempt {attempt + 1}): {e}")
+
+            if attempt < self.max_retries:
+                time.sleep(2 ** attempt)
+
+        raise RuntimeError(
+            f"MapBox matrix tile of {len(source_coords)}x{len(destination_coords)} failed after {self.max_retries + 1} attempts."
+        )
+
+    def fetch_matrix_tiled(self,
+        profile: Literal["mapbox/driving", "mapbox/walking", "mapbox/cycling", "mapbox/driving-traffic"],
+        annotations: Literal["duration", "distance", "duration,distance"],
+        approache: Literal["unrestricted", "curb"],
+        default_speed: int,
+        source_coords: List[Tuple[float, float]],
+        destination_coords: List[Tuple[float, float]],
+    ) -> List[List[float]]:
+        """
+        Fetches a source x destination matrix of any size by splitting it into tiles that respect
+        the Matrix API coordinate limit. Tiles are fetched concurrently by a bounded worker pool
+        and retried individually; cells of tiles that still fail are None.
+
+        :param source_coords: (longitude, latitude) of every source.
+        :param destination_coords: (longitude, latitude) of every destination.
+        :return: Matrix with one row per source and one column per destination.
+        """
+        return self.fetch_matrix_blocks(
+            profile, annotations, approache, default_speed, [(source_coords, destination_coords)]
+        )[0]
+
+    def fetch_matrix_blocks(self,
+        profile: Literal["mapbox/driving", "mapbox/walking", "mapbox/cycling", "mapbox/driving-traffic"],
+        annotations: Literal["duration", "distance", "duration,distance"],
+        approache: Literal["unrestricted", "curb"],
+        default_speed: int,
+        blocks: List[Tuple[List[Tuple[float, float]], List[Tuple[float, float]]]],
+    ) -> List[List[List[float]]]:
+        """
+        Fetches several source x destination matrices, tiling each one within the coordinate limit
+        and sharing one bounded worker pool across the tiles of every block. A tile that still fails
+        after its retries leaves its cells None, the other tiles are returned as usual.
+
+        :param blocks: List of (source coordinates, destination coordinates), each (longitude, latitude).
+        :return: One matrix per block, with one row per source and one column per destination.
+        :raise RuntimeError: If every tile failed.
+        """
+        limit = matrix_coordinate_limit(profile)
+
+        matrices = []
+        tiles = []
+        for block, (source_coords, destination_coords) in enumerate(blocks):
+            matrices.append([[None] * len(destination_coords) for _ in source_coords])
+            if not source_coords or not destination_coords:
+                continue
+
+            tile_sources, tile_destinations = tile_shape(len(source_coords), len(destination_coords), limit)
+            tiles.extend(
+                (block, row, col, source_coords[row:row + tile_sources], destination_coords[col:col + tile_destinations])
+                for row in range(0, len(source_coords), tile_sources)
+                for col in range(0, len(destination_coords), tile_destinations)
+            )
+
+        if not tiles:
+            return matrices
+        logger.debug(f"Fetching {len(blocks)} matrix blocks in {len(tiles)} tiles.")
+
+        def fetch(tile):
+            block, row, col, tile_source_coords, tile_destination_coords = tile
+            try:
+                durations = self._fetch_tile(
+                    profile, annotations, approache, default_speed, tile_source_coords, tile_destination_coords
+                )
+            except Exception as e:
+                logger.warning(str(e))
+                durations = None
+            return block, row, col, durations
+
+        failed = 0
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tiles))) as executor:
+            for block, row, col, durations in executor.map(fetch, tiles):
+                if durations is None:
+                    failed += 1
+                    continue
+                matrix = matrices[block]
+                for i, values in enumerate(durations):
+                    matrix[row + i][col:col + len(values)] = values
+
+        if failed == len(tiles):
+            raise RuntimeError(f"All {failed} MapBox matrix tiles failed.")
+        if failed:
+            logger.warning(f"{failed} of {len(tiles)} MapBox matrix tiles failed, their cells are left empty.")
+
+        return matrices
@@ -0,0 +1,280 @@
+import logging
+import os
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from adapters.MariaDB import (
+    ACCOMMODATION_COLUMNS,
+    ACTIVITY_COLUMNS,
+    LARGE_PAIR_SET_SIZE,
+    accommodation_detail,
+    activity_detail,
+    duration_records,
+    remember_place_keys,
+    split_cached_place_keys,
+    upsert_durations_stmt,
+)
+from common.mariadb_schema import Activity, Accommodation, Duration, Place
+from common.place_catalog import PLACE_CATALOG
+from common.semantic_cache import RECOMMENDATION_CACHE
+from common.utils import transform_time_to_int
+
+logger = logging.getLogger(__name__)
+
+# Async engines are bound to the event loop that first uses them; create one per process/loop.
+_async_engine = None
+_async_sessionmaker = None
+
+
+def _async_mariadb_uri() -> str:
+    """
+    Returns MARIADB_ASYNC_URI, or MARIADB_URI with its driver switched to asyncmy.
+    """
+    async_uri = os.getenv("MARIADB_ASYNC_URI")
+    if async_uri:
+        return async_uri
+
+    mariadb_uri = os.getenv("MARIADB_URI")
+    if not mariadb_uri:
+        raise ValueError("MARIADB_URI environment variable not set.")
+
+    return make_url(mariadb_uri).set(drivername="mysql+asyncmy").render_as_string(
+        hide_password=False
+    )
+
+
+def get_shared_async_engine():
+    """
+    Returns the process-wide async SQLAlchemy engine, creating it on first use.
+    """
+    global _async_engine, _async_sessionmaker
+
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            _async_mariadb_uri(),
+            pool_size=10,
+            max_overflow=5,
+            pool_recycle=600,
+            pool_timeout=600,
+            pool_pre_ping=True,
+        )
+        _async_sessionmaker = async_sessionmaker(bind=_async_engine, expire_on_commit=False)
+        logger.info("Created shared async MariaDB engine.")
+
+    return _async_engine
+
+
+class AsyncMariaDB_Adaptor:
+    """
+    asyncio counterpart of MariaDB_Adaptor for async handlers, so database waits
+    can overlap with LLM and MapBox I/O.
+
+    Usage:
+        async with AsyncMariaDB_Adaptor() as adaptor:
+            activities = await adaptor.fetch_activities(place_ids)
+    """
+
+    def __init__(self):
+        self.engine = get_shared_async_engine()
+        self.Session = _async_sessionmaker
+        self.session = None
+
+    async def __aenter__(self):
+        self.session = self.Session()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if exc_type:
+            logger.error(f"Exception: {exc_type}, {exc_val}, {exc_tb}")
+            await self.session.rollback()
+        await self.session.close()
+        self.session = None
+
+    def get_engine(self):
+        return self.engine
+
+    async def fetch_accommodations(self, place_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetches latitude, longitude, and business hours for each place ID from the Accommodation table.
+
+        :param place_ids: List of place IDs.
+        :return: Dictionary mapping place_id to its details.
+        """
+        place_details, uncached_ids = PLACE_CATALOG.get(Accommodation.__tablename__, place_ids)
+
+        if uncached_ids:
+            result = await self.session.execute(
+                select(*ACCOMMODATION_COLUMNS).where(Accommodation.id.in_(uncached_ids))
+            )
+            fetched = {row.id: accommodation_detail(row) for row in result}
+            PLACE_CATALOG.refresh(Accommodation.__tablename__, fetched)
+            place_details.update(fetched)
+
+        missing_ids = set(place_ids) - set(place_details.keys())
+        if missing_ids:
+            logger.warning(f"Accommodation details not found for IDs: {missing_ids}")
+
+        return place_details
+
+    async def fetch_activities(self, place_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetches latitude, longitude, business hours and duration for each place ID from the Activity table.
+
+        :param place_ids: List of place IDs.
+        :return: Dictionary mapping place_id to its details.
+        """
+        place_details, uncached_ids = PLACE_CATALOG.get(Activity.__tablename__, place_ids)
+
+        if uncached_ids:
+            result = await self.session.execute(
+                select(*ACTIVITY_COLUMNS).where(Activity.id.in_(uncached_ids))
+            )
+            fetched = {row.id: activity_detail(row) for row in result}
+            PLACE_CATALOG.refresh(Activity.__tablename__, fetched)
+            place_details.update(fetched)
+
+        missing_ids = set(place_ids) - set(place_details.keys())
+        if missing_ids:
+            logger.warning(f"Activity details not found for IDs: {missing_ids}")
+
+        return place_details
+
+    async def update_value_by_place_id(
+        self, table: Activity | Accommodation, record_id: str, updates: Dict[str, Any]
+    ) -> bool:
+        """
+        Updates the specified fields of a record in the given table.
+
+        :param table: The SQLAlchemy table class (Activity or Accommodation).
+        :param record_id: The ID of the record to update.
+        :param updates: A dictionary of column names and values to update.
+        :return: True if the update was successful, False otherwise.
+        """
+        try:
+            record = await self.session.get(table, record_id)
+            if not record:
+                logger.warning(
+                    f"Record with ID {record_id} not found in {table.__tablename__}."
+                )
+                return False
+
+            for column, value in updates.items():
+                if hasattr(record, column):
+                    setattr(record, column, value)
+                else:
+                    logger.warning(
+                        f"Column '{column}' does not exist on {table.__tablename__}."
+                    )
+
+            if "start_time" in updates or "end_time" in updates:
+                record.start_q, record.end_q = transform_time_to_int(
+                    record.start_time, record.end_time
+                )
+
+            await self.session.commit()
+            PLACE_CATALOG.invalidate(table.__tablename__, [record_id])
+            RECOMMENDATION_CACHE.invalidate_places([record_id])
+            logger.info(
+                f"Record with ID {record_id} in {table.__tablename__} updated successfully."
+            )
+            return True
+        except Exception as e:
+            await self.session.rollback()
+            logger.error(
+                f"Error updating record {record_id} in {table.__tablename__}: {e}"
+            )
+            return False
+
+    async def get_place_keys(self, place_ids, create: bool = False) -> Dict[str, int]:
+        """
+        Resolves place IDs to their integer Place.place_key.
+
+        :param place_ids: Iterable of place IDs.
+        :param create: Register place IDs that have no key yet.
+        :return: Dictionary mapping place_id to place_key for every known place.
+        """
+        place_keys, unknown_ids = split_cached_place_keys(place_ids)
+
+        if unknown_ids:
+            if create:
+                await self.session.execute(
+                    insert(Place).prefix_with("IGNORE"),
+                    [{"place_id": place_id} for place_id in unknown_ids],
+                )
+            result = await self.session.execute(
+                select(Place.place_id, Place.place_key).where(Place.place_id.in_(unknown_ids))
+            )
+            place_keys.update(remember_place_keys(result))
+
+        return place_keys
+
+    async def fetch_durations(self, pairs: List[Tuple[str, str]]) -> List[Tuple[str, str, int]]:
+        """
+        Executes a query to retrieve durations through the integer place keys.
+        Large pair sets are filtered by their source and destination place sets and streamed.
+
+        :param pairs: List of (source_id, destination_id) tuples.
+        :return: List of tuples containing (source_id, destination_id, duration in quarter hours).
+        """
+        if not pairs:
+            return []
+
+        keys = await self.get_place_keys(place for pair in pairs for place in pair)
+        key_pairs = [
+            (keys[source], keys[destination])
+            for source, destination in pairs
+            if source in keys and destination in keys
+        ]
+        if not key_pairs:
+            return []
+
+        place_ids = {key: place_id for place_id, key in keys.items()}
+        columns = (Duration.source_key, Duration.destination_key, Duration.duration_q)
+
+        if len(key_pairs) > LARGE_PAIR_SET_SIZE:
+            wanted = set(key_pairs)
+            stmt = select(*columns).where(
+                Duration.source_key.in_({source for source, _ in wanted}),
+                Duration.destination_key.in_({destination for _, destination in wanted}),
+            )
+            records = [
+                row
+                async for row in await self.session.stream(stmt)
+                if (row.source_key, row.destination_key) in wanted
+            ]
+        else:
+            result = await self.session.execute(
+                select(*columns).where(
+                    tuple_(Duration.source_key, Duration.destination_key).in_(key_pairs)
+                )
+            )
+            records = result.all()
+
+        return [
+            (
+                place_ids[source_key],
+                place_ids[destination_key],
+                duration_q,
+            )
+            for source_key, destination_key, duration_q in records
+        ]
+
+    async def upsert_durations(self, pairs: List[Tuple[str, str, float]]):
+        """
+        Upserts the Duration table with new durations or updates existing records if conflicts occur.
+
+        :param pairs: List of (source_id, destination_id, duration) tuples.
+        """
+        if not pairs:
+            return
+
+        keys = await self.get_place_keys(
+            (place for pair in pairs for place in pair[:2]), create=True
+        )
+
+        await self.session.execute(upsert_durations_stmt(duration_records(pairs, keys)))
+        await self.session.commit()
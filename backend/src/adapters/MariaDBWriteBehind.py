@@ -0,0 +1,133 @@
+import atexit
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from adapters.MariaDB import get_shared_engine
+from common.mariadb_schema import Activity, Accommodation
+from common.place_catalog import PLACE_CATALOG
+from common.semantic_cache import RECOMMENDATION_CACHE
+
+logger = logging.getLogger(__name__)
+
+TABLES = {table.__tablename__: table for table in (Activity, Accommodation)}
+
+
+class EnrichmentWriteBuffer:
+    """
+    Write-behind buffer for description/NER enrichment updates.
+
+    Updates are merged per record and written as one executemany UPDATE per table
+    once max_batch_size records are pending, every flush_interval seconds, and on shutdown.
+    The in-memory place catalog is patched immediately so readers see enriched values
+    before they are flushed.
+    """
+
+    def __init__(self, max_batch_size: int = 50, flush_interval: float = 5.0):
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+
+        self._pending: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._worker = None
+
+    def start(self):
+        if self._worker is not None:
+            return
+
+        self._stopped.clear()
+        self._worker = threading.Thread(
+            target=self._run, name="enrichment-write-behind", daemon=True
+        )
+        self._worker.start()
+        atexit.register(self.close)
+
+    def close(self):
+        """Stops the background flusher and writes everything still pending."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._worker is not None:
+            self._worker.join(timeout=self.flush_interval * 2)
+            self._worker = None
+        self.flush()
+
+    def enqueue(self, table: Activity | Accommodation, record_id: str, updates: Dict[str, Any]):
+        """
+        Queues column updates for a record.
+
+        :param table: The SQLAlchemy table class (Activity or Accommodation).
+        :param record_id: The ID of the record to update.
+        :param updates: A dictionary of column names and values to update.
+        """
+        with self._lock:
+            self._pending.setdefault((table.__tablename__, record_id), {}).update(updates)
+            pending_count = len(self._pending)
+
+        PLACE_CATALOG.patch(table.__tablename__, record_id, updates)
+        RECOMMENDATION_CACHE.invalidate_places([record_id])
+
+        if pending_count >= self.max_batch_size:
+            self._wakeup.set()
+
+        if self._worker is None:
+            # No background flusher, write synchronously
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Writes all pending updates.
+
+        :return: Number of records written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+
+            if not batch:
+                return 0
+
+            # executemany needs the same parameter set for every row
+            groups: Dict[Tuple[str, Tuple[str, ...]], List[Dict[str, Any]]] = {}
+            for (table_name, record_id), updates in batch.items():
+                key = (table_name, tuple(sorted(updates)))
+                groups.setdefault(key, []).append({"id": record_id, **updates})
+
+            try:
+                # A session of its own, so a synchronous flush never commits or discards the caller's session
+                with Session(bind=get_shared_engine()) as session, session.begin():
+                    for (table_name, _), rows in groups.items():
+                        session.execute(update(TABLES[table_name]), rows)
+            except Exception as e:
+                logger.error(f"Error flushing {len(batch)} enrichment updates: {e}")
+                self._requeue(batch)
+                return 0
+
+            logger.info(f"Flushed {len(batch)} enrichment updates.")
+            return len(batch)
+
+    def _requeue(self, batch: Dict[Tuple[str, str], Dict[str, Any]]):
+        with self._lock:
+            for key, updates in batch.items():
+                # Updates queued after the failed flush are newer and win
+                self._pending[key] = {**updates, **self._pending.get(key, {})}
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(timeout=self.flush_interval)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            self.flush()
+
+
+ENRICHMENT_WRITE_BUFFER = EnrichmentWriteBuffer(
+    max_batch_size=int(os.getenv("ENRICHMENT_FLUSH_SIZE", 50)),
+    flush_interval=float(os.getenv("ENRICHMENT_FLUSH_INTERVAL", 5.0)),
+)
@@ -1,10 +1,25 @@
+import atexit
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
 import weaviate
+from weaviate.classes.config import Configure, DataType, Property
 from weaviate.classes.init import Auth
 from weaviate.classes.query import Rerank, MetadataQuery
+from weaviate.util import generate_uuid5
 from dotenv import load_dotenv
 import os
+from typing import Dict, List
 from weaviate.classes.query import Filter
 
+from adapters.WeaviatePool import WeaviateClientPool
+from common.lru_cache import BRIDGE_ID_CACHE, LRUTTLCache
+from common.stage_timings import RETRIEVAL_TIMINGS
+
+logger = logging.getLogger(__name__)
+
 load_dotenv(override=True)
 gpt_key = os.getenv("OPENAI_APIKEY")
 cohere_key = os.getenv("COHERE_KEY")
@@ -12,52 +27,246 @@ url = os.getenv("WEAVIATE_HOST")
 
 headers = {"X-OpenAI-Api-Key": gpt_key, "X-Cohere-Api-Key": cohere_key}
 
+# Connected clients shared by every Weaviate_Adapter in the process
+WEAVIATE_POOL = WeaviateClientPool(
+    lambda: weaviate.connect_to_local(host=url, headers=headers),
+    max_size=int(os.getenv("WEAVIATE_POOL_SIZE", 4)),
+    checkout_timeout=float(os.getenv("WEAVIATE_POOL_TIMEOUT", 30)),
+    health_check_interval=float(os.getenv("WEAVIATE_HEALTH_CHECK_INTERVAL", 30)),
+)
+atexit.register(WEAVIATE_POOL.close)
+
+# Hybrid candidates fetched per query, of which the best RERANK_TOP_N are reranked (0 disables
+# reranking) and RETRIEVAL_LIMIT are returned
+RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", 50))
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", 20))
+RETRIEVAL_LIMIT = int(os.getenv("RETRIEVAL_LIMIT", 10))
+
+# Maps collection names used in code to the reindexed collection currently serving them
+ALIAS_COLLECTION = "Collection_Alias"
+_ALIASES = LRUTTLCache(max_size=256, ttl=float(os.getenv("WEAVIATE_ALIAS_TTL", 60)))
+# (collection, property) -> whether the collection schema has the property
+_HAS_PROPERTY = LRUTTLCache(max_size=256, ttl=float(os.getenv("WEAVIATE_ALIAS_TTL", 60)))
+
 
 class Weaviate_Adapter:
+    """
+    Weaviate access through pooled clients. connect() checks a client out of WEAVIATE_POOL
+    for the calling thread and close() gives it back, so one adapter can be shared by
+    concurrent socket handlers.
+    """
+
     def __init__(self):
-        self.client = None
+        self._local = threading.local()
+
+    @property
+    def client(self):
+        return getattr(self._local, "client", None)
 
     def connect(self):
         if self.client is None:
-            self.client = weaviate.connect_to_local(host=url, headers=headers)
+            self._local.client = WEAVIATE_POOL.checkout()
         else:
             print("Already connected to Weaviate.")
 
-    def close(self):
+    def close(self, healthy: bool = True):
         if self.client is not None:
-            self.client.close()
-            self.client = None
+            WEAVIATE_POOL.release(self.client, healthy=healthy)
+            self._local.client = None
         else:
             print("Weaviate client is already closed.")
 
+    @contextmanager
+    def connection(self):
+        """
+        Holds a pooled client for the duration of the block. A client whose block raised is
+        health-checked before it goes back to the pool.
+        """
+        self.connect()
+        healthy = True
+        try:
+            yield self
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            self.close(healthy=healthy)
+
     def get_collections(self, collection_name: str):
-        return self.client.collections.get(collection_name)
+        return self.client.collections.get(self.resolve_collection(collection_name))
+
+    def resolve_collection(self, name: str) -> str:
+        """
+        Follows the alias written by the reindex job; a name without alias is its own target.
+        """
+        target = _ALIASES.get(name)
+        if target is None:
+            target = name
+            if self.client.collections.exists(ALIAS_COLLECTION):
+                alias = self.client.collections.get(ALIAS_COLLECTION).query.fetch_object_by_id(
+                    generate_uuid5(name, ALIAS_COLLECTION)
+                )
+                if alias is not None:
+                    target = alias.properties["target"]
+            _ALIASES.put(name, target)
+        return target
+
+    def set_alias(self, name: str, target: str):
+        """
+        Points name at target with a single object write, so readers switch collections at once.
+        """
+        if not self.client.collections.exists(ALIAS_COLLECTION):
+            self.client.collections.create(
+                ALIAS_COLLECTION,
+                vectorizer_config=Configure.Vectorizer.none(),
+                properties=[
+                    Property(name="alias", data_type=DataType.TEXT),
+                    Property(name="target", data_type=DataType.TEXT),
+                ],
+            )
+
+        aliases = self.client.collections.get(ALIAS_COLLECTION)
+        uuid = generate_uuid5(name, ALIAS_COLLECTION)
+        properties = {"alias": name, "target": target}
+        if aliases.query.fetch_object_by_id(uuid) is None:
+            aliases.data.insert(properties=properties, uuid=uuid)
+        else:
+            aliases.data.replace(properties=properties, uuid=uuid)
+        _ALIASES.put(name, target)
 
-    def hybrid_query(self, collection, limit_num, prop_name, query):
+    def has_property(self, collection, property_name: str) -> bool:
+        key = (collection.name, property_name)
+        found = _HAS_PROPERTY.get(key)
+        if found is None:
+            found = any(prop.name == property_name for prop in collection.config.get().properties)
+            _HAS_PROPERTY.put(key, found)
+        return found
+
+    def batch_import(self, collection_name: str, objects, batch_size: int = 100, concurrent_requests: int = 2):
+        """
+        Imports (uuid, properties) or (uuid, properties, vector) tuples with fixed-size batches
+        sent over a bounded number of concurrent requests. Objects with an existing uuid are
+        replaced; objects given a vector are not vectorized again.
+
+        :return: List of objects that failed to import.
+        """
+        collection = self.get_collections(collection_name)
+        with collection.batch.fixed_size(
+            batch_size=batch_size, concurrent_requests=concurrent_requests
+        ) as batch:
+            for uuid, properties, *vector in objects:
+                batch.add_object(properties=properties, uuid=uuid, vector=vector[0] if vector else None)
+        return collection.batch.failed_objects
+
+    def hybrid_query(
+        self, collection, limit_num, prop_name, query, return_properties=None, vector=None, rerank=True, filters=None
+    ):
+        """
+        :param vector: Query vector; when given Weaviate skips vectorizing the query text.
+        :param rerank: Reranks the hits on prop_name with the reranker module of the collection.
+        """
         response = collection.query.hybrid(
             query=query,
+            vector=None if vector is None else [float(value) for value in vector],
             limit=limit_num,
-            rerank=Rerank(prop=prop_name, query=query),
+            filters=filters,
+            rerank=Rerank(prop=prop_name, query=query) if rerank else None,
             return_metadata=MetadataQuery(score=True),
+            return_properties=return_properties,
         )
         return response
 
+    def resolve_bridge_ids(self, bridge_name: str, property_name: str, id_property: str, names: List[str]) -> Dict[str, str]:
+        """
+        Maps place names to MariaDB ids through a bridge collection. Names are served from
+        BRIDGE_ID_CACHE when possible and the rest are resolved with a single filtered query.
+
+        :return: Dictionary mapping name to id for every name found in the bridge.
+        """
+        names = list(dict.fromkeys(name for name in names if name is not None))
+        cached = BRIDGE_ID_CACHE.get_many((bridge_name, name) for name in names)
+        ids = {name: cached[(bridge_name, name)] for name in names if (bridge_name, name) in cached}
+
+        missing = [name for name in names if name not in ids]
+        if not missing:
+            return ids
+
+        bridge_response = self.get_collections(bridge_name).query.fetch_objects(
+            filters=Filter.any_of([Filter.by_property(property_name).equal(name) for name in missing]),
+            return_properties=[property_name, id_property],
+            # Word-tokenized equality can also match longer names
+            limit=max(25, 5 * len(missing)),
+        )
+
+        resolved = {}
+        wanted = set(missing)
+        for obj in bridge_response.objects:
+            name = obj.properties.get(property_name)
+            if name in wanted and name not in resolved:
+                resolved[name] = obj.properties.get(id_property)
+
+        BRIDGE_ID_CACHE.put_many(((bridge_name, name), place_id) for name, place_id in resolved.items())
+        ids.update(resolved)
+        return ids
+
+    def _rerank_size(self, candidates: int, deadline: float | None) -> int:
+        """
+        Number of candidates to rerank: RERANK_TOP_N, cut down to what the measured cost per
+        candidate fits into the time left, or 0 when fewer than RETRIEVAL_LIMIT would fit.
+        """
+        size = min(RERANK_TOP_N, candidates)
+        if size == 0 or deadline is None:
+            return size
+
+        remaining = deadline - time.monotonic()
+        per_candidate = RETRIEVAL_TIMINGS.per_unit("rerank")
+        if per_candidate is None and remaining > 0:
+            return size
+
+        affordable = int(remaining / per_candidate) if remaining > 0 else 0
+        if affordable >= size:
+            return size
+        if affordable < min(RETRIEVAL_LIMIT, candidates):
+            RETRIEVAL_TIMINGS.count("rerank_skipped")
+            return 0
+        RETRIEVAL_TIMINGS.count("rerank_truncated")
+        return affordable
+
     def remove_dup_and_get_id(
-        self, collection_name, property_name, message, bridge_name, id_property
+        self, collection_name, property_name, message, bridge_name, id_property, query_vector=None, deadline=None
     ):
         """
         Helper function to fetch, process, and deduplicate recommendations.
+
+        Retrieval runs in stages timed in RETRIEVAL_TIMINGS: RETRIEVAL_CANDIDATES hybrid hits
+        without reranking, then a reranked query restricted to the best candidates, sized to
+        fit the time left before deadline; the remaining candidates follow the reranked
+        ones. Scores only order the results of one call: rerank scores, ranks below them for
+        the candidates that were not reranked, or hybrid scores when reranking was skipped or failed.
+
+        :param deadline: time.monotonic() by which results are due, None for no budget.
         """
         collections = self.get_collections(collection_name)
-        response = self.hybrid_query(collections, 10, "about_and_tags", message)
-        print([obj.properties[property_name] for obj in response.objects])
+        # Reindexed collections carry the MariaDB id on every object
+        embeds_id = self.has_property(collections, id_property)
+        return_properties = [property_name, "about_and_tags", "latitude", "longitude"] + (
+            [id_property] if embeds_id else []
+        )
+
+        with RETRIEVAL_TIMINGS.time("candidates"):
+            response = self.hybrid_query(
+                collections,
+                RETRIEVAL_CANDIDATES,
+                "about_and_tags",
+                message,
+                return_properties=return_properties,
+                vector=query_vector,
+                rerank=False,
+            )
 
         seen = set()
-        response_json = [
-            {
-                **obj.properties,
-                "score": obj.metadata.rerank_score,
-            }
+        candidates = [
+            obj
             for obj in response.objects
             if (
                 obj.properties[property_name],
@@ -74,17 +283,55 @@ class Weaviate_Adapter:
             )
         ]
 
-        bridge_collections = self.get_collections(bridge_name)
+        response_json = [
+            {**obj.properties, "score": obj.metadata.score} for obj in candidates[:RETRIEVAL_LIMIT]
+        ]
+
+        rerank_size = self._rerank_size(len(candidates), deadline)
+        if rerank_size:
+            top = candidates[:rerank_size]
+            try:
+                with RETRIEVAL_TIMINGS.time("rerank", units=rerank_size):
+                    reranked = self.hybrid_query(
+                        collections,
+                        rerank_size,
+                        "about_and_tags",
+                        message,
+                        return_properties=return_properties,
+                        vector=query_vector,
+                        filters=Filter.by_id().contains_any([obj.uuid for obj in top]),
+                    )
+            except Exception as e:
+                RETRIEVAL_TIMINGS.count("rerank_failed")
+                logger.warning(f"Rerank failed, keeping hybrid order: {e}")
+            else:
+                rerank_scores = {obj.uuid: obj.metadata.rerank_score or 0 for obj in reranked.objects}
+                top.sort(key=lambda obj: rerank_scores.get(obj.uuid, 0), reverse=True)
+                # Candidates beyond the reranked ones keep their hybrid order below them and score
+                # under the lowest rerank score, so a smaller rerank never drops results
+                floor = min(rerank_scores.values(), default=0)
+                response_json = [
+                    {**obj.properties, "score": rerank_scores.get(obj.uuid, 0)} for obj in top
+                ] + [
+                    {**obj.properties, "score": floor - position - 1}
+                    for position, obj in enumerate(candidates[rerank_size:RETRIEVAL_LIMIT])
+                ]
+                response_json = response_json[:RETRIEVAL_LIMIT]
+        logger.debug(f"Retrieved {[entry[property_name] for entry in response_json]}")
+
         for entry in response_json:
-            bridge_response = bridge_collections.query.fetch_objects(
-                filters=(
-                    Filter.by_property(property_name).equal(entry.get(property_name))
-                    # & Filter.by_property("longitude").equal(entry.get("longitude"))
-                    # & Filter.by_property("latitude").equal(entry.get("latitude"))
-                ),
-                limit=1,
-            )
-            if bridge_response.objects:
-                entry["id"] = bridge_response.objects[0].properties.get(id_property)
+            if entry.get(id_property):
+                entry["id"] = entry[id_property]
+
+        # Objects without an embedded id fall back to the bridge name lookup
+        unresolved = [entry for entry in response_json if "id" not in entry]
+        if unresolved:
+            with RETRIEVAL_TIMINGS.time("bridge_ids"):
+                ids = self.resolve_bridge_ids(
+                    bridge_name, property_name, id_property, [entry.get(property_name) for entry in unresolved]
+                )
+            for entry in unresolved:
+                if entry.get(property_name) in ids:
+                    entry["id"] = ids[entry.get(property_name)]
 
         return response_json
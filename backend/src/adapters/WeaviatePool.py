@@ -0,0 +1,136 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class WeaviateClientPool:
+    """
+    Process-wide pool of connected Weaviate clients.
+
+    Clients keep their gRPC/HTTP channels open between checkouts. A client that sat
+    idle longer than health_check_interval is checked with is_ready() before it is
+    handed out, and a client that failed or is no longer ready is closed and replaced.
+    At most max_size clients exist; further checkouts wait up to checkout_timeout seconds.
+
+    :param factory: Creates and connects a new client.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        max_size: int = 4,
+        checkout_timeout: float = 30.0,
+        health_check_interval: float = 30.0,
+    ):
+        self.factory = factory
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+
+        # (client, returned_at), most recently returned last
+        self._idle: List[Tuple[Any, float]] = []
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self.created = 0
+        self.discarded = 0
+
+    def _is_healthy(self, client) -> bool:
+        try:
+            return client.is_ready()
+        except Exception as e:
+            logger.warning(f"Weaviate health check failed: {e}")
+            return False
+
+    def _discard(self, client):
+        try:
+            client.close()
+        except Exception as e:
+            logger.warning(f"Closing a Weaviate client failed: {e}")
+        with self._condition:
+            self._size -= 1
+            self.discarded += 1
+            self._condition.notify()
+
+    def checkout(self):
+        """
+        Takes an idle client, or connects a new one while the pool is below max_size.
+
+        :return: Connected Weaviate client, to be given back with release().
+        """
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            with self._condition:
+                if self._closed:
+                    raise RuntimeError("Weaviate client pool is closed.")
+
+                if self._idle:
+                    client, returned_at = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                    client, returned_at = None, None
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"No Weaviate client available within {self.checkout_timeout}s.")
+                    self._condition.wait(remaining)
+                    continue
+
+            if client is None:
+                try:
+                    client = self.factory()
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+                with self._condition:
+                    self.created += 1
+                return client
+
+            if time.monotonic() - returned_at < self.health_check_interval or self._is_healthy(client):
+                return client
+
+            logger.warning("Replacing a Weaviate client that is no longer ready.")
+            self._discard(client)
+
+    def release(self, client, healthy: bool = True):
+        """
+        Gives a client back. Clients released as unhealthy are checked and replaced if they are not ready.
+        """
+        if not healthy and not self._is_healthy(client):
+            self._discard(client)
+            return
+
+        with self._condition:
+            if self._closed:
+                self._size -= 1
+            else:
+                self._idle.append((client, time.monotonic()))
+                self._condition.notify()
+                return
+        client.close()
+
+    def close(self):
+        """Closes every idle client; clients still checked out are closed when released."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for client, _ in idle:
+            client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "checked_out": self._size - len(self._idle),
+                "created": self.created,
+                "discarded": self.discarded,
+            }
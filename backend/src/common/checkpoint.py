@@ -0,0 +1,26 @@
+import json
+import os
+from typing import Any, Dict
+
+
+def load_checkpoint(path: str) -> Dict[str, Any]:
+    """
+    Reads a job checkpoint.
+
+    :param path: Checkpoint file.
+    :return: Checkpoint dictionary, empty when the file does not exist.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_checkpoint(path: str, checkpoint: Dict[str, Any]):
+    """
+    Writes a job checkpoint through a temporary file so an interrupted write never leaves it truncated.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(checkpoint, file)
+    os.replace(tmp_path, path)
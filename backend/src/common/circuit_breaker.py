@@ -0,0 +1,85 @@
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Rolling-window circuit breaker for an external dependency.
+
+    Calls that raise or take longer than slow_call_seconds count as failures. Once at least
+    min_calls of the last window_size calls were recorded and the failure rate reaches
+    failure_rate_threshold, the breaker opens and rejects calls for reset_timeout seconds.
+    It then lets a single trial call through (half-open) and closes again if it succeeds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 5.0,
+        window_size: int = 20,
+        min_calls: int = 5,
+        reset_timeout: float = 30.0,
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+
+        self.state = CircuitBreaker.CLOSED
+        self._results = deque(maxlen=window_size)
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == CircuitBreaker.CLOSED:
+                return True
+
+            if self.state == CircuitBreaker.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = CircuitBreaker.HALF_OPEN
+                self._trial_in_flight = False
+
+            # Half-open: exactly one trial call
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self, latency: float):
+        if latency > self.slow_call_seconds:
+            self.record_failure()
+            return
+
+        with self._lock:
+            self._results.append(True)
+            if self.state == CircuitBreaker.HALF_OPEN:
+                self.state = CircuitBreaker.CLOSED
+                self._results.clear()
+                logger.info(f"Circuit breaker '{self.name}' closed.")
+
+    def record_failure(self):
+        with self._lock:
+            self._results.append(False)
+            failures = self._results.count(False)
+
+            if self.state == CircuitBreaker.HALF_OPEN or (
+                len(self._results) >= self.min_calls
+                and failures / len(self._results) >= self.failure_rate_threshold
+            ):
+                if self.state != CircuitBreaker.OPEN:
+                    logger.warning(f"Circuit breaker '{self.name}' opened after {failures} failed calls.")
+                self.state = CircuitBreaker.OPEN
+                self._opened_at = time.monotonic()
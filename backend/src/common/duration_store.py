@@ -0,0 +1,175 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Cell value of an unknown duration
+MISSING = -1
+_MAX_QUARTERS = np.iinfo(np.int16).max
+_EXPORT_CHUNK_SIZE = 100000
+
+
+class DurationStore:
+    """
+    Read-only view of the exported duration matrix.
+
+    The store is a dense int16 .npy file of quarter-hour durations indexed by place index,
+    opened with mmap so every worker process shares it through the page cache, and a JSON
+    sidecar holding the matrix file name and the place_id of every index. The sidecar is
+    replaced last on export, so readers always see a matching matrix and index.
+
+    :param path: Sidecar path, the store is disabled when empty.
+    """
+
+    def __init__(self, path: str | None):
+        self.path = path
+        self._matrix = None
+        self._index: Dict[str, int] = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        with open(self.path, "r", encoding="utf-8") as file:
+            meta = json.load(file)
+
+        matrix = np.load(os.path.join(os.path.dirname(self.path), meta["matrix"]), mmap_mode="r")
+        index = {place_id: position for position, place_id in enumerate(meta["place_ids"])}
+        if matrix.shape != (len(index), len(index)):
+            raise ValueError(f"Matrix shape {matrix.shape} does not match {len(index)} place ids.")
+        return matrix, index
+
+    def refresh(self) -> bool:
+        """
+        Opens the store, or reopens it when the sidecar was replaced since the last call.
+
+        :return: True if a store is available.
+        """
+        if not self.path:
+            return False
+
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return self._matrix is not None
+
+        if mtime == self._mtime:
+            return True
+
+        with self._lock:
+            if mtime != self._mtime:
+                try:
+                    matrix, index = self._open()
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(f"Could not open duration store {self.path}: {e}")
+                    return self._matrix is not None
+
+                self._matrix, self._index, self._mtime = matrix, index, mtime
+                logger.info(f"Opened duration store of {len(index)} places.")
+
+        return True
+
+    def submatrix(self, place_ids: List[str]) -> np.ndarray:
+        """
+        Slices the durations between the given places with one fancy-index read.
+
+        :param place_ids: Places in row/column order.
+        :return: int32 matrix in quarter hours, MISSING for places or pairs the store does not hold.
+        """
+        matrix, index = self._matrix, self._index
+
+        size = len(place_ids)
+        result = np.full((size, size), MISSING, dtype=np.int32)
+        if matrix is None or size == 0:
+            return result
+
+        positions = np.fromiter((index.get(place_id, -1) for place_id in place_ids), dtype=np.intp, count=size)
+        known = np.flatnonzero(positions >= 0)
+        if known.size:
+            stored = positions[known]
+            result[np.ix_(known, known)] = matrix[np.ix_(stored, stored)]
+
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": bool(self.path),
+            "loaded": self._matrix is not None,
+            "places": len(self._index),
+        }
+
+
+def export_duration_store(
+    path: str,
+    place_ids: List[str],
+    durations: Iterable[Tuple[int, int, int]],
+):
+    """
+    Writes a new matrix file and then atomically replaces the sidecar, so running readers pick up
+    the new store on their next refresh. The previous matrix file is removed afterwards; processes
+    that still map it keep reading it until they reopen.
+
+    :param path: Sidecar path.
+    :param place_ids: place_id of every matrix index.
+    :param durations: Iterable of (source index, destination index, duration in quarter hours).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    stem = os.path.splitext(os.path.basename(path))[0]
+    matrix_name = f"{stem}-{time.time_ns()}.npy"
+    matrix_path = os.path.join(directory, matrix_name)
+
+    size = len(place_ids)
+    tmp_matrix_path = f"{matrix_path}.tmp"
+    matrix = np.lib.format.open_memmap(tmp_matrix_path, mode="w+", dtype=np.int16, shape=(size, size))
+    matrix[:] = MISSING
+    np.fill_diagonal(matrix, 0)
+
+    def write(chunk):
+        rows, cols, quarters = np.asarray(chunk, dtype=np.int64).T
+        matrix[rows, cols] = np.clip(quarters, 0, _MAX_QUARTERS)
+
+    count = 0
+    chunk = []
+    for record in durations:
+        chunk.append(record)
+        if len(chunk) >= _EXPORT_CHUNK_SIZE:
+            write(chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        write(chunk)
+        count += len(chunk)
+
+    matrix.flush()
+    del matrix
+    os.replace(tmp_matrix_path, matrix_path)
+
+    previous_matrix = None
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                previous_matrix = json.load(file).get("matrix")
+        except (OSError, ValueError):
+            pass
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump({"matrix": matrix_name, "place_ids": place_ids}, file)
+    os.replace(tmp_path, path)
+
+    if previous_matrix and previous_matrix != matrix_name:
+        try:
+            os.remove(os.path.join(directory, previous_matrix))
+        except FileNotFoundError:
+            pass
+
+    logger.info(f"Exported {count} durations between {size} places to {matrix_path}.")
+
+
+# Shared by every DurationMatrix, disabled unless DURATION_STORE_PATH is set
+DURATION_STORE = DurationStore(os.getenv("DURATION_STORE_PATH"))
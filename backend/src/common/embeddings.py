@@ -0,0 +1,62 @@
+import logging
+import os
+import re
+import threading
+
+import numpy as np
+from dotenv import load_dotenv
+
+from common.lru_cache import LRUTTLCache
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Must match the model the Weaviate collections are vectorized with
+QUERY_EMBEDDING_MODEL = os.getenv("QUERY_EMBEDDING_MODEL", "text-embedding-3-small")
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+# normalized query text -> unit-length query vector
+QUERY_EMBEDDING_CACHE = LRUTTLCache(
+    max_size=int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", 10000)),
+    ttl=float(os.getenv("QUERY_EMBEDDING_CACHE_TTL", 24 * 60 * 60)),
+)
+
+_embeddings = None
+_embeddings_lock = threading.Lock()
+
+
+def normalize_query(text: str) -> str:
+    """Case-folds the text and collapses punctuation and whitespace."""
+    return _NON_WORD.sub(" ", text.casefold()).strip()
+
+
+def _get_embeddings():
+    global _embeddings
+
+    if _embeddings is None:
+        with _embeddings_lock:
+            if _embeddings is None:
+                from langchain_openai import OpenAIEmbeddings
+
+                _embeddings = OpenAIEmbeddings(api_key=os.getenv("OPENAI_APIKEY"), model=QUERY_EMBEDDING_MODEL)
+    return _embeddings
+
+
+def embed_query(text: str) -> np.ndarray:
+    """
+    Embeds a user query. Queries that normalize to the same text share one cached vector.
+
+    :return: Unit-length float32 vector, read-only as it may be shared.
+    """
+    key = normalize_query(text)
+    vector = QUERY_EMBEDDING_CACHE.get(key)
+    if vector is None:
+        vector = np.asarray(_get_embeddings().embed_query(key or text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector = vector / norm
+        vector.flags.writeable = False
+        QUERY_EMBEDDING_CACHE.put(key, vector)
+    return vector
@@ -0,0 +1,41 @@
+import os
+from typing import Tuple
+
+from dotenv import load_dotenv
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
+from langchain_core.runnables import Runnable
+from langchain_openai import ChatOpenAI
+
+from common.utils import read_txt_files
+
+load_dotenv()
+
+
+def create_chat_llm(streaming: bool = False) -> ChatOpenAI:
+    """
+    The chat model of the chatbot, also used for place enrichment.
+    """
+    return ChatOpenAI(
+        api_key=os.getenv("OPENAI_APIKEY"), model="gpt-4o", temperature=0, streaming=streaming, max_tokens=250
+    )
+
+
+def build_enrichment_chains(llm: ChatOpenAI) -> Tuple[Runnable, Runnable]:
+    """
+    Builds the prompt chains that enrich a place from its about_and_tags text, shared by the
+    chatbot and the offline backfill job.
+
+    :return: Tuple containing:
+            - Description summary chain, invoked with {"des": text}.
+            - NER chain, invoked with {"text": text}.
+    """
+    parser = StrOutputParser()
+
+    summarize_description_prompt = read_txt_files("src/common/prompt/summarize_description.txt")
+    chain_description = PromptTemplate.from_template(summarize_description_prompt) | llm | parser
+
+    ner_prompt = read_txt_files("src/common/prompt/ner.txt")
+    chain_ner = ChatPromptTemplate.from_messages([("system", ner_prompt), ("user", "{text}")]) | llm | parser
+
+    return chain_description, chain_ner
@@ -0,0 +1,35 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in kilometres. Accepts scalars or broadcastable NumPy arrays of degrees.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(value, dtype=np.float64)) for value in (lat1, lon1, lat2, lon2))
+
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_matrix_km(source_coords, destination_coords) -> np.ndarray:
+    """
+    Pairwise great-circle distances.
+
+    :param source_coords: Sequence of (longitude, latitude), the order used for MapBox coordinates.
+    :param destination_coords: Sequence of (longitude, latitude).
+    :return: Array of shape (len(source_coords), len(destination_coords)) in kilometres.
+    """
+    sources = np.asarray(source_coords, dtype=np.float64).reshape(-1, 2)
+    destinations = np.asarray(destination_coords, dtype=np.float64).reshape(-1, 2)
+
+    return haversine_km(
+        sources[:, np.newaxis, 1],
+        sources[:, np.newaxis, 0],
+        destinations[np.newaxis, :, 1],
+        destinations[np.newaxis, :, 0],
+    )
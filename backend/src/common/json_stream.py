@@ -0,0 +1,130 @@
+import json
+from typing import Any, Iterator, Optional, TextIO, Tuple
+
+_WHITESPACE = " \t\n\r"
+
+
+class _JsonStream:
+    """
+    Incremental reader over a JSON text file that decodes one value at a time,
+    keeping only the unread part of the file in memory.
+    """
+
+    def __init__(self, file: TextIO, chunk_size: int = 1 << 16):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _read_more(self) -> bool:
+        if self.eof:
+            return False
+
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+
+        # Drop the consumed prefix before growing the buffer
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> Optional[str]:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read_more():
+                return None
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self.pos} of the current chunk.")
+        self.pos += 1
+
+    def decode(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._read_more():
+                    raise
+                continue
+
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and self._read_more():
+                continue
+
+            self.pos = end
+            return value
+
+    def iter_array(self) -> Iterator[Any]:
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+
+        while True:
+            yield self.decode()
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("]")
+            return
+
+
+def iter_json_records(file: TextIO) -> Iterator[Tuple[Optional[str], Any]]:
+    """
+    Streams records from a JSON document without loading it whole.
+
+    Supported layouts:
+    - a top-level array of records, yielded with section None;
+    - a top-level object whose array values are streamed element by element and
+      yielded with their key as section (e.g. {"activities": [...], "accommodations": [...]}).
+
+    :param file: Text file opened for reading.
+    :return: Generator of (section, record) tuples.
+    """
+    stream = _JsonStream(file)
+
+    if stream.peek() == "[":
+        for record in stream.iter_array():
+            yield None, record
+        return
+
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+
+    while True:
+        key = stream.decode()
+        stream.expect(":")
+        if stream.peek() == "[":
+            for record in stream.iter_array():
+                yield key, record
+        else:
+            stream.decode()
+
+        if stream.peek() == ",":
+            stream.pos += 1
+            continue
+        stream.expect("}")
+        return
+
+
+def iter_json_lines(file: TextIO) -> Iterator[Tuple[Optional[str], Any]]:
+    """
+    Streams records from a JSON Lines file, one record per non-empty line.
+
+    :param file: Text file opened for reading.
+    :return: Generator of (None, record) tuples.
+    """
+    for line in file:
+        line = line.strip()
+        if line:
+            yield None, json.loads(line)
@@ -0,0 +1,288 @@
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric words, as Weaviate's word tokenization."""
+    return _WORD.findall(text.casefold()) if text else []
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over the text properties of a collection, with Weaviate's default k1 and b.
+    The inverted index keeps one (document, term frequency) array pair per term.
+    """
+
+    def __init__(self, documents: List[str], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.size = len(documents)
+
+        postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        lengths = np.zeros(self.size, dtype=np.float32)
+        for position, document in enumerate(documents):
+            tokens = tokenize(document)
+            lengths[position] = len(tokens)
+            for term, frequency in Counter(tokens).items():
+                docs, frequencies = postings.setdefault(term, ([], []))
+                docs.append(position)
+                frequencies.append(frequency)
+
+        self._postings = {
+            term: (np.asarray(docs, dtype=np.intp), np.asarray(frequencies, dtype=np.float32))
+            for term, (docs, frequencies) in postings.items()
+        }
+        average = float(lengths.mean()) if self.size else 0.0
+        self._norm = k1 * (1 - b + b * lengths / average) if average else np.full(self.size, k1, dtype=np.float32)
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            docs, frequencies = posting
+            idf = math.log(1 + (self.size - docs.shape[0] + 0.5) / (docs.shape[0] + 0.5))
+            scores[docs] += idf * frequencies * (self.k1 + 1) / (frequencies + self._norm[docs])
+        return scores
+
+    def search(self, query: str, limit: int) -> List[Tuple[int, float]]:
+        scores = self.scores(query)
+        return [(int(position), float(scores[position])) for position in _top_k(scores, limit) if scores[position] > 0]
+
+
+class VectorIndex:
+    """
+    Cosine similarity over a matrix of unit-length vectors. Exact search is one matrix-vector
+    product; with use_hnsw and hnswlib installed an HNSW graph is built for approximate search.
+    """
+
+    def __init__(self, vectors: np.ndarray, use_hnsw: bool = False, ef: int = 64):
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+        self.ef = ef
+
+        self._hnsw = None
+        if use_hnsw and self.vectors.shape[0]:
+            try:
+                import hnswlib
+            except ImportError:
+                logger.warning("hnswlib is not installed, using exact vector search.")
+            else:
+                index = hnswlib.Index(space="ip", dim=self.vectors.shape[1])
+                index.init_index(max_elements=self.vectors.shape[0], ef_construction=200, M=16)
+                index.add_items(self.vectors, np.arange(self.vectors.shape[0]))
+                index.set_ef(ef)
+                self._hnsw = index
+
+    @property
+    def approximate(self) -> bool:
+        return self._hnsw is not None
+
+    def search(self, vector: np.ndarray, limit: int) -> List[Tuple[int, float]]:
+        limit = min(limit, self.vectors.shape[0])
+        if limit <= 0 or vector.shape[0] != self.vectors.shape[1]:
+            return []
+
+        if self._hnsw is not None:
+            labels, distances = self._hnsw.knn_query(vector, k=limit)
+            return [(int(label), 1.0 - float(distance)) for label, distance in zip(labels[0], distances[0])]
+
+        similarities = self.vectors @ vector
+        return [(int(position), float(similarities[position])) for position in _top_k(similarities, limit)]
+
+
+def _relative_scores(results: List[Tuple[int, float]]) -> Dict[int, float]:
+    """Min-max normalizes one result list, as Weaviate's relativeScoreFusion."""
+    if not results:
+        return {}
+    values = [score for _, score in results]
+    low, high = min(values), max(values)
+    if high == low:
+        return {position: 1.0 for position, _ in results}
+    return {position: (score - low) / (high - low) for position, score in results}
+
+
+class LocalCollection:
+    """
+    In-memory copy of an exported Weaviate collection: object properties, their vectors and a
+    BM25 index over the text properties.
+    """
+
+    def __init__(self, name: str, objects: List[Dict[str, Any]], vectors: np.ndarray, use_hnsw: bool = False):
+        if len(objects) != vectors.shape[0]:
+            raise ValueError(f"{len(objects)} objects but {vectors.shape[0]} vectors.")
+
+        self.name = name
+        self.objects = objects
+        self.vector_index = VectorIndex(np.asarray(vectors, dtype=np.float32), use_hnsw=use_hnsw)
+        self.bm25 = BM25Index(
+            [" ".join(str(value) for value in properties.values() if isinstance(value, str)) for properties in objects]
+        )
+
+    def __len__(self):
+        return len(self.objects)
+
+    def hybrid(
+        self, query: str, vector: np.ndarray | None, limit: int, alpha: float = 0.75
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Fuses keyword and vector results like Weaviate's default hybrid query; without a query
+        vector only the keyword side is used.
+
+        :return: List of (properties, score) tuples, best first.
+        """
+        keyword = _relative_scores(self.bm25.search(query, limit))
+        if vector is None:
+            fused = keyword
+        else:
+            semantic = _relative_scores(self.vector_index.search(vector, limit))
+            fused = {
+                position: alpha * semantic.get(position, 0.0) + (1 - alpha) * keyword.get(position, 0.0)
+                for position in semantic.keys() | keyword.keys()
+            }
+
+        ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(self.objects[position], score) for position, score in ranked]
+
+
+class LocalIndex:
+    """
+    Exported collections under one directory, each a JSON sidecar with the object properties
+    and the file name of a float32 .npy vector matrix. Collections are loaded on first use and
+    reloaded when their sidecar is replaced by a new export.
+
+    :param directory: Export directory, the index is disabled when empty.
+    """
+
+    def __init__(self, directory: str | None, use_hnsw: bool = False):
+        self.directory = directory
+        self.use_hnsw = use_hnsw
+        self._collections: Dict[str, Tuple[int, LocalCollection]] = {}
+        self._lock = threading.Lock()
+
+    def _sidecar(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.json")
+
+    def _load(self, name: str) -> LocalCollection:
+        for attempt in range(2):
+            with open(self._sidecar(name), "r", encoding="utf-8") as file:
+                meta = json.load(file)
+            try:
+                vectors = np.load(os.path.join(self.directory, meta["vectors"]))
+            except FileNotFoundError:
+                # An export replaced the sidecar and removed its vectors after we read it,
+                # the new sidecar points at the new vectors
+                if attempt:
+                    raise
+                continue
+            return LocalCollection(name, meta["objects"], vectors, use_hnsw=self.use_hnsw)
+
+    def get(self, name: str) -> LocalCollection:
+        """
+        :raise FileNotFoundError: If the collection was never exported.
+        """
+        if not self.directory:
+            raise FileNotFoundError("LOCAL_INDEX_DIR is not set.")
+
+        mtime = os.stat(self._sidecar(name)).st_mtime_ns
+        loaded = self._collections.get(name)
+        if loaded is not None and loaded[0] == mtime:
+            return loaded[1]
+
+        with self._lock:
+            loaded = self._collections.get(name)
+            if loaded is None or loaded[0] != mtime:
+                started = time.perf_counter()
+                collection = self._load(name)
+                self._collections[name] = (mtime, collection)
+                logger.info(
+                    f"Loaded local collection {name} of {len(collection)} objects "
+                    f"in {time.perf_counter() - started:.2f}s."
+                )
+            return self._collections[name][1]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": bool(self.directory),
+            "hnsw": self.use_hnsw,
+            "collections": {
+                name: {"objects": len(collection), "approximate": collection.vector_index.approximate}
+                for name, (_, collection) in self._collections.items()
+            },
+        }
+
+
+def export_local_collection(directory: str, name: str, objects: Iterable[Tuple[Dict[str, Any], List[float]]]):
+    """
+    Writes a new vector file and then atomically replaces the sidecar, so running readers load
+    the new export on their next query. The previous vector file is removed afterwards.
+
+    :param objects: Iterable of (properties, vector) tuples.
+    :return: Number of exported objects.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.json")
+
+    properties, vectors = [], []
+    for object_properties, vector in objects:
+        properties.append(object_properties)
+        vectors.append(vector)
+
+    vectors_name = f"{name}-{time.time_ns()}.npy"
+    vectors_path = os.path.join(directory, vectors_name)
+    matrix = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+    with open(f"{vectors_path}.tmp", "wb") as file:
+        np.save(file, matrix)
+    os.replace(f"{vectors_path}.tmp", vectors_path)
+
+    previous_vectors = None
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                previous_vectors = json.load(file).get("vectors")
+        except (OSError, ValueError):
+            pass
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump({"vectors": vectors_name, "objects": properties}, file, default=str)
+    os.replace(tmp_path, path)
+
+    if previous_vectors and previous_vectors != vectors_name:
+        try:
+            os.remove(os.path.join(directory, previous_vectors))
+        except FileNotFoundError:
+            pass
+
+    logger.info(f"Exported {len(properties)} objects of {name} to {directory}.")
+    return len(properties)
+
+
+# Shared by every LocalIndex_Adapter, disabled unless LOCAL_INDEX_DIR is set
+LOCAL_INDEX = LocalIndex(
+    os.getenv("LOCAL_INDEX_DIR"),
+    use_hnsw=os.getenv("LOCAL_INDEX_HNSW", "false").lower() == "true",
+)
@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Tuple
+
+
+class LRUTTLCache:
+    """
+    Bounded, thread-safe key/value cache with least-recently-used eviction and
+    a per-entry time to live.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _lookup(self, key: Hashable, now: float):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+
+        value, expires_at = entry
+        if expires_at <= now:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return False, None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, value
+
+    def _store(self, key: Hashable, value: Any, expires_at: float):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            found, value = self._lookup(key, time.monotonic())
+            return value if found else default
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """
+        :return: Dictionary of the keys that are cached and not expired.
+        """
+        now = time.monotonic()
+        result = {}
+        with self._lock:
+            for key in keys:
+                found, value = self._lookup(key, now)
+                if found:
+                    result[key] = value
+        return result
+
+    def put(self, key: Hashable, value: Any, ttl: float | None = None):
+        with self._lock:
+            self._store(key, value, time.monotonic() + (self.ttl if ttl is None else ttl))
+
+    def put_many(self, items: Iterable[Tuple[Hashable, Any]], ttl: float | None = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            for key, value in items:
+                self._store(key, value, expires_at)
+
+    def invalidate(self, keys: Iterable[Hashable]):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+# (source_id, destination_id) -> duration in quarter hours, shared by every DurationMatrix
+DURATION_PAIR_CACHE = LRUTTLCache(
+    max_size=int(os.getenv("DURATION_CACHE_SIZE", 100000)),
+    ttl=float(os.getenv("DURATION_CACHE_TTL", 24 * 60 * 60)),
+)
+
+# (bridge collection, place name) -> MariaDB place id, shared by every Weaviate_Adapter
+BRIDGE_ID_CACHE = LRUTTLCache(
+    max_size=int(os.getenv("BRIDGE_ID_CACHE_SIZE", 50000)),
+    ttl=float(os.getenv("BRIDGE_ID_CACHE_TTL", 24 * 60 * 60)),
+)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, Integer, PrimaryKeyConstraint
+from sqlalchemy import Column, String, Float, Integer, SmallInteger, Index, PrimaryKeyConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import Time as SQLAlchemyTime
 
@@ -17,6 +17,8 @@ class Activity(Base):
     longitude = Column(Float)
     start_time = Column(SQLAlchemyTime)  # SQLAlchemy Time datatype
     end_time = Column(SQLAlchemyTime)  # SQLAlchemy Time datatype
+    start_q = Column(SmallInteger)  # start_time as quarter-hour integer (0-96)
+    end_q = Column(SmallInteger)  # end_time as quarter-hour integer, may exceed 96 for overnight hours
     reviews = Column(String)
     nearby_foodAndDrink1 = Column(String(255))
     nearby_foodAndDrink2 = Column(String(255))
@@ -39,6 +41,8 @@ class Accommodation(Base):
     longitude = Column(Float)
     start_time = Column(SQLAlchemyTime)  # SQLAlchemy Time datatype
     end_time = Column(SQLAlchemyTime)  # SQLAlchemy Time datatype
+    start_q = Column(SmallInteger)  # start_time as quarter-hour integer (0-96)
+    end_q = Column(SmallInteger)  # end_time as quarter-hour integer, may exceed 96 for overnight hours
     reviews = Column(String)
     nearby_foodAndDrink1 = Column(String(255))
     nearby_foodAndDrink2 = Column(String(255))
@@ -49,11 +53,25 @@ class Accommodation(Base):
     image_url = Column(String)
 
 
+class Place(Base):
+    __tablename__ = "Place"
+
+    # Integer surrogate key shared by Activity and Accommodation ids
+    place_key = Column(Integer, primary_key=True, autoincrement=True)
+    place_id = Column(String(255), nullable=False, unique=True)
+
+
 class Duration(Base):
     __tablename__ = "Duration"
 
     source_id = Column(String(255), nullable=False)
     destination_id = Column(String(255), nullable=False)
     duration = Column(Float, nullable=False)
+    source_key = Column(Integer)  # Place.place_key of source_id
+    destination_key = Column(Integer)  # Place.place_key of destination_id
+    duration_q = Column(SmallInteger)  # duration in quarter hours, ceil(duration / 900)
 
-    __table_args__ = (PrimaryKeyConstraint("source_id", "destination_id"),)
+    __table_args__ = (
+        PrimaryKeyConstraint("source_id", "destination_id"),
+        Index("ix_duration_keys", "source_key", "destination_key", "duration_q"),
+    )
@@ -0,0 +1,255 @@
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from common.spatial_index import SpatialIndex
+
+logger = logging.getLogger(__name__)
+
+
+class _CatalogTable:
+    """
+    Column-oriented snapshot of one place table (Activity or Accommodation).
+
+    Numeric hot columns live in NumPy arrays, text columns in plain lists, and
+    rows are addressed through an id -> row index map.
+    """
+
+    def __init__(self, details: Dict[str, Dict[str, Any]], with_duration: bool):
+        self.with_duration = with_duration
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.about_and_tags: List[Optional[str]] = []
+        self.descriptions: List[Optional[str]] = []
+        self.image_urls: List[str] = []
+        self.coords = np.empty((0, 2), dtype=np.float64)
+        self.hours = np.empty((0, 2), dtype=np.int16)
+        self.durations = np.empty(0, dtype=np.int16)
+        self.stale = set()
+
+        self.extend(list(details.values()))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def extend(self, rows: List[Dict[str, Any]]):
+        if not rows:
+            return
+
+        for row in rows:
+            self.index[row["id"]] = len(self.ids)
+            self.ids.append(row["id"])
+            self.names.append(row["name"])
+            self.about_and_tags.append(row["about_and_tags"])
+            self.descriptions.append(row["description"])
+            self.image_urls.append(row["image_url"])
+
+        self.coords = np.concatenate([self.coords, np.array(
+            [(_to_float(row["latitude"]), _to_float(row["longitude"])) for row in rows],
+            dtype=np.float64,
+        )])
+        self.hours = np.concatenate([self.hours, np.array(
+            [(row["start_time_int"], row["end_time_int"]) for row in rows], dtype=np.int16
+        )])
+        if self.with_duration:
+            self.durations = np.concatenate([self.durations, np.array(
+                [row["duration"] for row in rows], dtype=np.int16
+            )])
+
+    def update(self, row: Dict[str, Any]):
+        idx = self.index[row["id"]]
+        self.names[idx] = row["name"]
+        self.about_and_tags[idx] = row["about_and_tags"]
+        self.descriptions[idx] = row["description"]
+        self.image_urls[idx] = row["image_url"]
+        self.coords[idx] = (_to_float(row["latitude"]), _to_float(row["longitude"]))
+        self.hours[idx] = (row["start_time_int"], row["end_time_int"])
+        if self.with_duration:
+            self.durations[idx] = row["duration"]
+
+    def row(self, idx: int) -> Dict[str, Any]:
+        latitude, longitude = self.coords[idx]
+        detail = {
+            "id": self.ids[idx],
+            "name": self.names[idx],
+            "about_and_tags": self.about_and_tags[idx],
+            "description": self.descriptions[idx],
+            "latitude": None if np.isnan(latitude) else float(latitude),
+            "longitude": None if np.isnan(longitude) else float(longitude),
+            "start_time_int": int(self.hours[idx, 0]),
+            "end_time_int": int(self.hours[idx, 1]),
+            "image_url": self.image_urls[idx],
+        }
+        if self.with_duration:
+            detail["duration"] = int(self.durations[idx])
+        return detail
+
+
+def _to_float(value) -> float:
+    return np.nan if value is None else float(value)
+
+
+class PlaceCatalog:
+    """
+    In-process snapshot of the Activity and Accommodation tables.
+
+    The catalog answers place detail lookups from memory. Rows written through
+    MariaDB_Adaptor are invalidated and reloaded from the database on next access.
+    """
+
+    def __init__(self):
+        self._tables: Dict[str, _CatalogTable] = {}
+        # Built on load, rebuilt on the next spatial query after rows are refreshed
+        self._spatial: Dict[str, SpatialIndex] = {}
+        self._lock = threading.RLock()
+
+    def load(self, activities: Dict[str, Dict[str, Any]], accommodations: Dict[str, Dict[str, Any]]):
+        """
+        Replaces the whole snapshot.
+
+        :param activities: Dictionary mapping activity id to its details.
+        :param accommodations: Dictionary mapping accommodation id to its details.
+        """
+        tables = {
+            "Activity": _CatalogTable(activities, with_duration=True),
+            "Accommodation": _CatalogTable(accommodations, with_duration=False),
+        }
+        spatial = {
+            table_name: SpatialIndex(table.ids, table.coords[:, 0], table.coords[:, 1])
+            for table_name, table in tables.items()
+        }
+        with self._lock:
+            self._tables = tables
+            self._spatial = spatial
+        logger.info(
+            f"Loaded place catalog: {len(tables['Activity'])} activities, {len(tables['Accommodation'])} accommodations."
+        )
+
+    def clear(self):
+        with self._lock:
+            self._tables = {}
+            self._spatial = {}
+
+    def is_loaded(self) -> bool:
+        return bool(self._tables)
+
+    def get(self, table_name: str, place_ids: List[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """
+        Looks up place details in the snapshot.
+
+        :param table_name: "Activity" or "Accommodation".
+        :param place_ids: List of place IDs.
+        :return: Tuple containing:
+                - Dictionary mapping place_id to its details for every cached row.
+                - List of place IDs that are unknown, invalidated or not yet enriched and must be read
+                  from the database. Rows without a description are re-read because another process,
+                  e.g. jobs/backfill_enrichment.py, may have enriched them since the snapshot was taken.
+        """
+        with self._lock:
+            table = self._tables.get(table_name)
+            if table is None:
+                return {}, list(place_ids)
+
+            found, missing = {}, []
+            for place_id in place_ids:
+                idx = table.index.get(place_id)
+                if idx is None or place_id in table.stale or table.descriptions[idx] is None:
+                    missing.append(place_id)
+                else:
+                    found[place_id] = table.row(idx)
+            return found, missing
+
+    def invalidate(self, table_name: str, place_ids: List[str]):
+        """
+        Marks rows as stale so the next lookup reads them from the database.
+        """
+        with self._lock:
+            table = self._tables.get(table_name)
+            if table is not None:
+                table.stale.update(place_id for place_id in place_ids if place_id in table.index)
+
+    def patch(self, table_name: str, place_id: str, updates: Dict[str, Any]):
+        """
+        Applies column updates to a cached row before they reach the database.
+        Columns that are not stored as plain text invalidate the row instead.
+        """
+        with self._lock:
+            table = self._tables.get(table_name)
+            if table is None or place_id not in table.index:
+                return
+
+            idx = table.index[place_id]
+            text_columns = {
+                "name": table.names,
+                "about_and_tags": table.about_and_tags,
+                "description": table.descriptions,
+                "image_url": table.image_urls,
+            }
+            for column, value in updates.items():
+                if column in text_columns:
+                    text_columns[column][idx] = value
+                else:
+                    table.stale.add(place_id)
+
+    def refresh(self, table_name: str, details: Dict[str, Dict[str, Any]]):
+        """
+        Stores freshly read rows, replacing stale copies and appending new places.
+        Does nothing while the catalog is not loaded.
+        """
+        with self._lock:
+            table = self._tables.get(table_name)
+            if table is None:
+                return
+
+            new_rows = []
+            for place_id, detail in details.items():
+                if place_id in table.index:
+                    table.update(detail)
+                    table.stale.discard(place_id)
+                else:
+                    new_rows.append(detail)
+            table.extend(new_rows)
+            self._spatial.pop(table_name, None)
+
+    def _spatial_index(self, table_name: str) -> SpatialIndex | None:
+        with self._lock:
+            table = self._tables.get(table_name)
+            if table is None:
+                return None
+
+            index = self._spatial.get(table_name)
+            if index is None:
+                index = SpatialIndex(table.ids, table.coords[:, 0], table.coords[:, 1])
+                self._spatial[table_name] = index
+            return index
+
+    def within_radius(self, table_name: str, latitude: float, longitude: float, radius_km: float) -> List[Tuple[str, float]]:
+        """
+        Lists the places of a table within radius_km of a point.
+
+        :return: List of (place_id, distance km) tuples, nearest first; empty while the catalog is not loaded.
+        """
+        index = self._spatial_index(table_name)
+        return [] if index is None else index.within_radius(latitude, longitude, radius_km)
+
+    def nearest(self, table_name: str, latitude: float, longitude: float, k: int, max_km: float | None = None) -> List[Tuple[str, float]]:
+        """
+        Lists the k places of a table closest to a point.
+
+        :return: List of (place_id, distance km) tuples, nearest first; empty while the catalog is not loaded.
+        """
+        index = self._spatial_index(table_name)
+        return [] if index is None else index.nearest(latitude, longitude, k, max_km)
+
+    def within_bounds(self, table_name: str, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[str]:
+        """
+        Lists the place ids of a table inside a latitude/longitude box.
+        """
+        index = self._spatial_index(table_name)
+        return [] if index is None else index.within_bounds(min_lat, min_lon, max_lat, max_lon)
+
+
+PLACE_CATALOG = PlaceCatalog()
@@ -0,0 +1,205 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from common.embeddings import embed_query, normalize_query
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "slot", "place_ids")
+
+    def __init__(self, value: Any, expires_at: float, slot: Optional[int], place_ids: Set[str]):
+        self.value = value
+        self.expires_at = expires_at
+        self.slot = slot
+        self.place_ids = place_ids
+
+
+class SemanticResultCache:
+    """
+    Two-tier cache of recommendation results.
+
+    Queries are first matched exactly on their normalized text, then approximately on
+    the cosine similarity of their embeddings. Entries expire after ttl seconds, the
+    least recently used entry is evicted beyond max_size, and invalidate_places drops
+    every entry that contains one of the given places.
+
+    :param embed: Maps a query to a unit-length vector, None keeps only the exact tier.
+    :param similarity_threshold: Minimum cosine similarity of an approximate match.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        similarity_threshold: float,
+        embed: Callable[[str], np.ndarray] | None = None,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.embed = embed
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._by_place: Dict[str, Set[str]] = {}
+        # One embedding row per slot, slots of evicted entries are reused
+        self._vectors: np.ndarray | None = None
+        self._slot_keys: List[Optional[str]] = [None] * max_size
+        self._free_slots = list(range(max_size - 1, -1, -1))
+        self._lock = threading.Lock()
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        if entry.slot is not None:
+            self._slot_keys[entry.slot] = None
+            self._free_slots.append(entry.slot)
+        for place_id in entry.place_ids:
+            keys = self._by_place.get(place_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_place[place_id]
+
+    def _embed(self, text: str) -> np.ndarray | None:
+        if self.embed is None:
+            return None
+        try:
+            return self.embed(text)
+        except Exception as e:
+            logger.warning(f"Query embedding failed, using exact matches only: {e}")
+            return None
+
+    def _nearest(self, vector: np.ndarray, now: float) -> Optional[str]:
+        if self._vectors is None or vector.shape[0] != self._vectors.shape[1]:
+            return None
+
+        occupied = [slot for slot, key in enumerate(self._slot_keys) if key is not None]
+        if not occupied:
+            return None
+
+        similarities = self._vectors[occupied] @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+
+        key = self._slot_keys[occupied[best]]
+        if self._entries[key].expires_at <= now:
+            self._remove(key)
+            return None
+        return key
+
+    def lookup(self, text: str) -> Tuple[Any, np.ndarray | None]:
+        """
+        :return: Tuple containing:
+                - Cached value, or None on a miss.
+                - Query embedding computed for the approximate tier, to be passed on to put().
+        """
+        key = normalize_query(text)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.exact_hits += 1
+                    return entry.value, None
+                self._remove(key)
+
+        vector = self._embed(text)
+        if vector is None:
+            with self._lock:
+                self.misses += 1
+            return None, None
+
+        with self._lock:
+            match = self._nearest(vector, now)
+            if match is None:
+                self.misses += 1
+                return None, vector
+
+            self._entries.move_to_end(match)
+            self.semantic_hits += 1
+            return self._entries[match].value, vector
+
+    def put(self, text: str, value: Any, place_ids: Iterable[str], vector: np.ndarray | None = None):
+        """
+        Stores a result together with the places it contains.
+        """
+        key = normalize_query(text)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            while len(self._entries) >= self.max_size:
+                self._remove(next(iter(self._entries)))
+
+            slot = None
+            if vector is not None:
+                if self._vectors is None:
+                    self._vectors = np.zeros((self.max_size, vector.shape[0]), dtype=np.float32)
+                if vector.shape[0] == self._vectors.shape[1]:
+                    slot = self._free_slots.pop()
+                    self._vectors[slot] = vector
+                    self._slot_keys[slot] = key
+
+            place_ids = set(place_ids)
+            self._entries[key] = _Entry(value, time.monotonic() + self.ttl, slot, place_ids)
+            for place_id in place_ids:
+                self._by_place.setdefault(place_id, set()).add(key)
+
+    def invalidate_places(self, place_ids: Iterable[str]):
+        """
+        Drops every cached result that contains one of the places, e.g. after it was re-enriched.
+        """
+        with self._lock:
+            keys = set()
+            for place_id in place_ids:
+                keys.update(self._by_place.get(place_id, ()))
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "similarity_threshold": self.similarity_threshold,
+                "semantic": self.embed is not None,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+# normalized user message -> fetch_place_detail output
+RECOMMENDATION_CACHE = SemanticResultCache(
+    max_size=int(os.getenv("RECOMMENDATION_CACHE_SIZE", 1000)),
+    ttl=float(os.getenv("RECOMMENDATION_CACHE_TTL", 60 * 60)),
+    similarity_threshold=float(os.getenv("RECOMMENDATION_CACHE_SIMILARITY", 0.92)),
+    embed=embed_query if os.getenv("RECOMMENDATION_CACHE_SEMANTIC", "true").lower() == "true" else None,
+)
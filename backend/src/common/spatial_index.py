@@ -0,0 +1,118 @@
+import math
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from common.geo import haversine_km
+
+KM_PER_DEGREE = 111.32
+
+
+class SpatialIndex:
+    """
+    Grid index over place coordinates for radius, nearest-neighbour and bounding-box queries.
+
+    Points are bucketed into square cells of cell_km degrees of latitude; a query only
+    measures the points of the cells overlapping its search window and filters them by
+    great-circle distance. Places without coordinates are left out.
+
+    :param ids: Place id of every point.
+    :param latitudes: Latitudes in degrees, NaN for unknown.
+    :param longitudes: Longitudes in degrees, NaN for unknown.
+    :param cell_km: Cell edge, roughly the typical query radius.
+    """
+
+    def __init__(self, ids: Sequence[str], latitudes, longitudes, cell_km: float = 2.0):
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        valid = ~(np.isnan(latitudes) | np.isnan(longitudes))
+
+        self.ids = [place_id for place_id, keep in zip(ids, valid.tolist()) if keep]
+        self.latitudes = latitudes[valid]
+        self.longitudes = longitudes[valid]
+        self.cell = cell_km / KM_PER_DEGREE
+
+        rows = np.floor(self.latitudes / self.cell).astype(np.int64)
+        cols = np.floor(self.longitudes / self.cell).astype(np.int64)
+        buckets = defaultdict(list)
+        for point, cell in enumerate(zip(rows.tolist(), cols.tolist())):
+            buckets[cell].append(point)
+        self.cells: Dict[Tuple[int, int], np.ndarray] = {
+            cell: np.array(points, dtype=np.intp) for cell, points in buckets.items()
+        }
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _candidates(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        row_range = range(math.floor(min_lat / self.cell), math.floor(max_lat / self.cell) + 1)
+        col_range = range(math.floor(min_lon / self.cell), math.floor(max_lon / self.cell) + 1)
+
+        # Sparse catalogs have far fewer occupied cells than a wide window spans
+        if len(row_range) * len(col_range) > len(self.cells):
+            chunks = [
+                points
+                for (row, col), points in self.cells.items()
+                if row in row_range and col in col_range
+            ]
+        else:
+            chunks = [
+                self.cells[(row, col)]
+                for row in row_range
+                for col in col_range
+                if (row, col) in self.cells
+            ]
+
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.intp)
+
+    def _window(self, latitude: float, longitude: float, radius_km: float):
+        lat_span = radius_km / KM_PER_DEGREE
+        max_abs_lat = min(abs(latitude) + lat_span, 89.9)
+        lon_span = min(radius_km / (KM_PER_DEGREE * math.cos(math.radians(max_abs_lat))), 180.0)
+        return latitude - lat_span, longitude - lon_span, latitude + lat_span, longitude + lon_span
+
+    def _measure(self, points: np.ndarray, latitude: float, longitude: float) -> np.ndarray:
+        return haversine_km(latitude, longitude, self.latitudes[points], self.longitudes[points])
+
+    def within_radius(self, latitude: float, longitude: float, radius_km: float) -> List[Tuple[str, float]]:
+        """
+        :return: List of (place_id, distance km) tuples within the radius, nearest first.
+        """
+        points = self._candidates(*self._window(latitude, longitude, radius_km))
+        distances = self._measure(points, latitude, longitude)
+
+        keep = distances <= radius_km
+        points, distances = points[keep], distances[keep]
+        order = np.argsort(distances, kind="stable")
+        return [(self.ids[point], float(distance)) for point, distance in zip(points[order].tolist(), distances[order].tolist())]
+
+    def nearest(self, latitude: float, longitude: float, k: int, max_km: float | None = None) -> List[Tuple[str, float]]:
+        """
+        :return: Up to k (place_id, distance km) tuples, nearest first.
+        """
+        if k <= 0 or not self.ids:
+            return []
+
+        # Widen the radius until it holds k points; every closer point is then inside it too
+        radius = self.cell * KM_PER_DEGREE
+        while True:
+            if max_km is not None:
+                radius = min(radius, max_km)
+            found = self.within_radius(latitude, longitude, radius)
+            if len(found) >= k or (max_km is not None and radius >= max_km) or radius >= 2 * math.pi * 6371.0:
+                return found[:k]
+            radius *= 2
+
+    def within_bounds(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[str]:
+        """
+        :return: Place ids inside the latitude/longitude box.
+        """
+        points = self._candidates(min_lat, min_lon, max_lat, max_lon)
+        keep = (
+            (self.latitudes[points] >= min_lat)
+            & (self.latitudes[points] <= max_lat)
+            & (self.longitudes[points] >= min_lon)
+            & (self.longitudes[points] <= max_lon)
+        )
+        return [self.ids[point] for point in np.sort(points[keep]).tolist()]
@@ -0,0 +1,74 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict
+
+import numpy as np
+
+
+class StageTimings:
+    """
+    Latency of named request stages over a sliding window of recent calls, plus a smoothed
+    cost per unit of work (e.g. per reranked candidate) used to predict the next call.
+
+    :param window: Number of recent durations kept per stage for the percentiles.
+    :param smoothing: Weight of the newest sample in the per-unit moving average.
+    """
+
+    def __init__(self, window: int = 1000, smoothing: float = 0.2):
+        self.window = window
+        self.smoothing = smoothing
+
+        self._durations: Dict[str, deque] = {}
+        self._per_unit: Dict[str, float] = {}
+        self._events: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float, units: int = 1):
+        with self._lock:
+            self._durations.setdefault(stage, deque(maxlen=self.window)).append(seconds)
+            if units > 0:
+                sample = seconds / units
+                previous = self._per_unit.get(stage)
+                self._per_unit[stage] = (
+                    sample if previous is None else previous + self.smoothing * (sample - previous)
+                )
+
+    @contextmanager
+    def time(self, stage: str, units: int = 1):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started, units)
+
+    def per_unit(self, stage: str) -> float | None:
+        """
+        :return: Smoothed seconds per unit of the stage, None before its first call.
+        """
+        return self._per_unit.get(stage)
+
+    def count(self, event: str):
+        with self._lock:
+            self._events[event] = self._events.get(event, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {}
+            for stage, durations in self._durations.items():
+                milliseconds = np.fromiter(durations, dtype=np.float64, count=len(durations)) * 1000
+                p50, p95 = np.percentile(milliseconds, [50, 95])
+                stages[stage] = {
+                    "count": len(durations),
+                    "mean_ms": float(milliseconds.mean()),
+                    "p50_ms": float(p50),
+                    "p95_ms": float(p95),
+                    "max_ms": float(milliseconds.max()),
+                }
+            return {"window": self.window, "stages": stages, "events": dict(self._events)}
+
+
+# Per-stage latency of recommendation retrieval, shared by every retrieval backend
+RETRIEVAL_TIMINGS = StageTimings(window=int(os.getenv("RETRIEVAL_TIMING_WINDOW", 1000)))
@@ -1,99 +1,209 @@
+import copy
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from adapters.Weaviate import Weaviate_Adapter
-from adapters.MariaDB import MariaDB_Adaptor
+from adapters.MariaDB import MariaDB_Adaptor, remove_session
+from adapters.MariaDBWriteBehind import ENRICHMENT_WRITE_BUFFER
+from common.embeddings import embed_query
 from common.mariadb_schema import Accommodation, Activity
+from common.place_catalog import PLACE_CATALOG
+from common.semantic_cache import RECOMMENDATION_CACHE
+from common.stage_timings import RETRIEVAL_TIMINGS
 from common.utils import rename_field
 
-def fetch_place_detail(
-    message: str, weaviate_adapter: Weaviate_Adapter, mariadb_adaptor: MariaDB_Adaptor,
-    summarize_description, NER
-):
-    weaviate_adapter.connect()
-    
-    # Fetch and process activity recommendations
-    activity_response_json = weaviate_adapter.remove_dup_and_get_id(
-        collection_name="Activity_Embedded",
-        property_name="name",
-        message=message,
-        bridge_name="Activity_Bridge",
-        id_property="activity_id",
-    )
+logger = logging.getLogger(__name__)
 
-    # Fetch and process accommodation recommendations
-    accommodation_response_json = weaviate_adapter.remove_dup_and_get_id(
-        collection_name="Accommodation_Embedded",
-        property_name="name",
-        message=message,
-        bridge_name="Accommodation_Bridge",
-        id_property="accommodation_id",
-    )
+# Activities farther than this from the best-matching accommodation are dropped, unset keeps every match
+ACTIVITY_RADIUS_KM = float(os.getenv("ACTIVITY_RADIUS_KM", 0)) or None
 
-    weaviate_adapter.close()
+# Retrieval of a message should finish within this many milliseconds, reranking is cut down or
+# skipped to fit; 0 disables the budget
+RETRIEVAL_BUDGET_MS = float(os.getenv("RETRIEVAL_BUDGET_MS", 0))
 
-    # Step 1: Sort the JSON responses by score
-    activity_response_json.sort(key=lambda x: x.get("score", 0), reverse=True)
-    accommodation_response_json.sort(key=lambda x: x.get("score", 0), reverse=True)
+# The activity and accommodation pipelines of a message run side by side on this pool
+_CATEGORY_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("RECOMMENDATION_WORKERS", 8)), thread_name_prefix="recommendation"
+)
 
-    # Step 2: Fetch related activities and accommodations
-    activities = mariadb_adaptor.fetch_activities(
-        [item.get("id") for item in activity_response_json]
-    )
-    accommodations = mariadb_adaptor.fetch_accommodations(
-        [item.get("id") for item in accommodation_response_json]
-    )
+CATEGORIES = {
+    "activities": {
+        "table": Activity,
+        "collection_name": "Activity_Embedded",
+        "bridge_name": "Activity_Bridge",
+        "id_property": "activity_id",
+    },
+    "accommodations": {
+        "table": Accommodation,
+        "collection_name": "Accommodation_Embedded",
+        "bridge_name": "Accommodation_Bridge",
+        "id_property": "accommodation_id",
+    },
+}
 
-    # Step 3: Map scores to the fetched data
-    activity_score_map = {
-        item.get("id"): item.get("score", 0) for item in activity_response_json
-    }
-    accommodation_score_map = {
-        item.get("id"): item.get("score", 0) for item in accommodation_response_json
-    }
 
-    # Step 4: Rename fields and include scores for sorting
-    activities = [
-        {**rename_field(key, value), "score": activity_score_map.get(key)}
-        for key, value in activities.items()
-    ]
-    accommodations = [
-        {**rename_field(key, value), "score": accommodation_score_map.get(key)}
-        for key, value in accommodations.items()
-    ]
+def _in_worker(fn, *args):
+    """Runs fn on a pool thread and releases that thread's MariaDB session afterwards."""
+    try:
+        return fn(*args)
+    finally:
+        remove_session()
 
-    # Step 5: Final sorting by score (to ensure correct order)
-    activities.sort(key=lambda x: x["score"], reverse=True)
-    accommodations.sort(key=lambda x: x["score"], reverse=True)
 
-    # Step 6: Return results without the score in the final output
-    for activity in activities:
-        activity.pop("score")
-    for accommodation in accommodations:
-        accommodation.pop("score")
+def _embed_message(message):
+    """
+    :return: Query vector shared by both categories, or None to let the retrieval backend embed the text.
+    """
+    try:
+        with RETRIEVAL_TIMINGS.time("embedding"):
+            return embed_query(message)
+    except Exception as e:
+        logger.warning(f"Query embedding failed, retrieval will vectorize the text: {e}")
+        return None
 
-    for place in activities:
+
+def _retrieve_category(category, message, query_vector, deadline, weaviate_adapter, mariadb_adaptor):
+    """
+    Runs the hybrid+rerank query of one category and reads the matching places from MariaDB.
+
+    :return: Tuple containing:
+            - List of recommendations sorted by score, each with its place id.
+            - Dictionary mapping place_id to its details.
+    """
+    config = CATEGORIES[category]
+
+    with weaviate_adapter.connection():
+        response_json = weaviate_adapter.remove_dup_and_get_id(
+            collection_name=config["collection_name"],
+            property_name="name",
+            message=message,
+            bridge_name=config["bridge_name"],
+            id_property=config["id_property"],
+            query_vector=query_vector,
+            deadline=deadline,
+        )
+
+    # Sort the JSON response by score
+    response_json.sort(key=lambda x: x.get("score", 0), reverse=True)
+
+    ids = [item.get("id") for item in response_json]
+    with RETRIEVAL_TIMINGS.time("place_details"):
+        if category == "activities":
+            details = mariadb_adaptor.fetch_activities(ids)
+        else:
+            details = mariadb_adaptor.fetch_accommodations(ids)
+
+    return response_json, details
+
+
+def _finalize_category(category, response_json, details, summarize_description, NER):
+    """
+    Renames fields, orders the places by score and enriches places without a description.
+    """
+    score_map = {item.get("id"): item.get("score", 0) for item in response_json}
+
+    # Rename fields and include scores for sorting
+    places = [
+        {**rename_field(key, value), "score": score_map.get(key)}
+        for key, value in details.items()
+    ]
+
+    # Final sorting by score (to ensure correct order), the score is not part of the output
+    places.sort(key=lambda x: x["score"], reverse=True)
+    for place in places:
+        place.pop("score")
+
+    for place in places:
         if place.get("description") == None:
             place["description"] = summarize_description(place.get("tag"))
             place["tag"] = NER(place.get("tag"))
 
-            mariadb_adaptor.update_value_by_place_id(
-                Activity,
+            ENRICHMENT_WRITE_BUFFER.enqueue(
+                CATEGORIES[category]["table"],
                 place["id"],
                 {"description": place["description"], "about_and_tags": place["tag"]},
             )
 
-    for place in accommodations:
-        if place.get("description") == None:
-            place["description"] = summarize_description(place.get("tag"))
-            place["tag"] = NER(place.get("tag"))
+    return places
 
-            mariadb_adaptor.update_value_by_place_id(
-                Accommodation,
-                place["id"],
-                {"description": place["description"], "about_and_tags": place["tag"]},
+
+def fetch_place_detail(
+    message: str, weaviate_adapter: Weaviate_Adapter, mariadb_adaptor: MariaDB_Adaptor,
+    summarize_description, NER
+):
+    deadline = time.monotonic() + RETRIEVAL_BUDGET_MS / 1000 if RETRIEVAL_BUDGET_MS else None
+
+    cached, query_vector = RECOMMENDATION_CACHE.lookup(message)
+    if cached is not None:
+        return copy.deepcopy(cached)
+
+    if query_vector is None:
+        query_vector = _embed_message(message)
+
+    output_data = _fetch_place_detail(
+        message, query_vector, deadline, weaviate_adapter, mariadb_adaptor, summarize_description, NER
+    )
+
+    RECOMMENDATION_CACHE.put(
+        message,
+        copy.deepcopy(output_data),
+        [place["id"] for places in output_data.values() for place in places],
+        query_vector,
+    )
+    return output_data
+
+
+def _fetch_place_detail(
+    message: str, query_vector, deadline, weaviate_adapter: Weaviate_Adapter, mariadb_adaptor: MariaDB_Adaptor,
+    summarize_description, NER
+):
+    # Step 1: Query both categories concurrently with the same query vector
+    retrievals = {
+        category: _CATEGORY_EXECUTOR.submit(
+            _in_worker, _retrieve_category, category, message, query_vector, deadline,
+            weaviate_adapter, mariadb_adaptor,
+        )
+        for category in CATEGORIES
+    }
+    results = {category: future.result() for category, future in retrievals.items()}
+
+    # Step 2: Keep activities within reach of the top accommodation
+    accommodation_response_json, accommodations = results["accommodations"]
+    top_accommodation = (
+        accommodations.get(accommodation_response_json[0].get("id")) if accommodation_response_json else None
+    )
+    if (
+        ACTIVITY_RADIUS_KM
+        and PLACE_CATALOG.is_loaded()
+        and top_accommodation
+        and top_accommodation.get("latitude") is not None
+        and top_accommodation.get("longitude") is not None
+    ):
+        nearby = {
+            place_id
+            for place_id, _ in PLACE_CATALOG.within_radius(
+                "Activity", top_accommodation["latitude"], top_accommodation["longitude"], ACTIVITY_RADIUS_KM
             )
+        }
+        activity_response_json, activities = results["activities"]
+        results["activities"] = (
+            activity_response_json,
+            {key: value for key, value in activities.items() if key in nearby},
+        )
+
+    # Step 3: Rename, sort and enrich both categories concurrently
+    finalizations = {
+        category: _CATEGORY_EXECUTOR.submit(
+            _in_worker, _finalize_category, category, response_json, details, summarize_description, NER
+        )
+        for category, (response_json, details) in results.items()
+    }
 
     output_data = {
-        "accommodations": accommodations,
-        "activities": activities,
+        "accommodations": finalizations["accommodations"].result(),
+        "activities": finalizations["activities"].result(),
     }
 
     return output_data
@@ -9,12 +9,12 @@ from langchain_openai import ChatOpenAI
 from langchain_core.documents import Document
 from langchain.schema import SystemMessage, HumanMessage
 from langchain_core.prompts import PromptTemplate, ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 
 # Local imports
 from controllers.ventical_n_day.vrp import VRPSolver
 from controllers.ventical_n_day.randomize import validate_route, randomize_payload
 from controllers.interface import fetch_place_detail
+from common.enrichment import build_enrichment_chains, create_chat_llm
 from common.utils import read_txt_files
 from langgraph.graph import MessagesState, StateGraph, END, START
 from pydantic import BaseModel, Field
@@ -36,7 +36,7 @@ class UserIntent(BaseModel):
 class StreamingChatbot:
     def __init__(self, weaviate_adapter, mariadb_adaptor):
         self.api_key = os.getenv("OPENAI_APIKEY")
-        self.llm = ChatOpenAI(api_key=self.api_key, model="gpt-4o", temperature=0, streaming=True, max_tokens=250)
+        self.llm = create_chat_llm(streaming=True)
         self.graph = self._build_graph()
         self.config = {"configurable": {"thread_id": str(uuid.uuid4())}}
         self.weaviate_adapter = weaviate_adapter
@@ -44,8 +44,6 @@ class StreamingChatbot:
         self._init_prompt_and_chain()
 
     def _init_prompt_and_chain(self):
-        parser = StrOutputParser()
-
         self.intent_classify_prompt = read_txt_files(
             "src/common/prompt/intent_classification.txt"
         )
@@ -64,25 +62,11 @@ class StreamingChatbot:
             "src/common/prompt/etc_non_travel_answer.txt"
         )
 
-        # summarize only description
-        summarize_description_prompt = read_txt_files(
-            "src/common/prompt/summarize_description.txt"
-        )
-        self.summarize_description_prompt_template = PromptTemplate.from_template(
-            summarize_description_prompt
-        )
-
-        # summarize only description
-        ner_prompt = read_txt_files("src/common/prompt/ner.txt")
-        ner_prompt_template = ChatPromptTemplate.from_messages(
-            [("system", ner_prompt), ("user", "{text}")]
-        )
-        self.chain_ner = ner_prompt_template | self.llm | parser
+        # description summary and NER, shared with the enrichment backfill job
+        self.chain_summarize_description, self.chain_ner = build_enrichment_chains(self.llm)
     
     def summarize_description(self, des):
-        result = self.summarize_description_prompt_template.format(des=des)
-        response = self.llm.invoke([HumanMessage(content=result)])
-        return response.content
+        return self.chain_summarize_description.invoke({"des": des})
     
     def name_entity_recognition(self, text):
         result = self.chain_ner.invoke({"text": text})
@@ -0,0 +1,140 @@
+import math
+import threading
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from adapters.MapBox import tile_shape
+
+# A Matrix request is weighed like this many billed elements when comparing plans
+REQUEST_COST_ELEMENTS = 25
+
+Block = Tuple[np.ndarray, np.ndarray]
+
+# Process-wide totals of every planned fetch
+_totals = {"needed": 0, "requested": 0, "requests": 0, "blocks": 0}
+_totals_lock = threading.Lock()
+
+
+def _cost(rows: int, cols: int, limit: int, request_cost: float) -> float:
+    tile_rows, tile_cols = tile_shape(rows, cols, limit)
+    requests = math.ceil(rows / tile_rows) * math.ceil(cols / tile_cols)
+    return rows * cols + request_cost * requests
+
+
+def _bits(indices) -> int:
+    bits = 0
+    for index in indices:
+        bits |= 1 << index
+    return bits
+
+
+def _indices(bits: int) -> np.ndarray:
+    return np.array([index for index in range(bits.bit_length()) if bits >> index & 1], dtype=np.intp)
+
+
+def _group_by_pattern(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Groups rows that miss exactly the same columns; every group is a rectangle without waste.
+
+    :return: List of (row bitset, column bitset) blocks.
+    """
+    groups: Dict[int, int] = {}
+    for row in np.flatnonzero(mask.any(axis=1)).tolist():
+        cols = _bits(np.flatnonzero(mask[row]).tolist())
+        groups[cols] = groups.get(cols, 0) | 1 << row
+
+    return [(rows, cols) for cols, rows in groups.items()]
+
+
+def _merge_greedily(blocks: List[Tuple[int, int]], limit: int, request_cost: float) -> List[Tuple[int, int]]:
+    """
+    Repeatedly merges the two blocks whose union saves the most cost, until no merge saves anything.
+    """
+    blocks = list(blocks)
+    costs = [_cost(rows.bit_count(), cols.bit_count(), limit, request_cost) for rows, cols in blocks]
+
+    while len(blocks) > 1:
+        best = None
+        for i in range(len(blocks)):
+            for j in range(i + 1, len(blocks)):
+                rows = blocks[i][0] | blocks[j][0]
+                cols = blocks[i][1] | blocks[j][1]
+                merged_cost = _cost(rows.bit_count(), cols.bit_count(), limit, request_cost)
+                saving = costs[i] + costs[j] - merged_cost
+                if saving > 0 and (best is None or saving > best[0]):
+                    best = (saving, i, j, (rows, cols), merged_cost)
+
+        if best is None:
+            break
+
+        _, i, j, block, merged_cost = best
+        blocks[i], costs[i] = block, merged_cost
+        del blocks[j], costs[j]
+
+    return blocks
+
+
+def plan_block_cover(mask: np.ndarray, limit: int, request_cost: float = REQUEST_COST_ELEMENTS) -> List[Block]:
+    """
+    Covers the missing cells of a source x destination mask with source x destination rectangles,
+    trading billed elements against the number of Matrix requests.
+
+    Rows (and, separately, columns) with identical missing sets start as exact rectangles that are
+    then merged while a merge lowers elements + request_cost * requests; the cheaper of the two
+    plans is returned.
+
+    :param mask: Boolean matrix, True where the duration is needed.
+    :param limit: Matrix API coordinate limit per request.
+    :param request_cost: Weight of one request in billed elements.
+    :return: List of (row indices, column indices) blocks whose cross products cover every True cell.
+    """
+    if not mask.any():
+        return []
+
+    by_rows = _merge_greedily(_group_by_pattern(mask), limit, request_cost)
+    by_cols = _merge_greedily(
+        [(rows, cols) for cols, rows in _group_by_pattern(mask.T)], limit, request_cost
+    )
+
+    def total(blocks):
+        return sum(_cost(rows.bit_count(), cols.bit_count(), limit, request_cost) for rows, cols in blocks)
+
+    best = by_rows if total(by_rows) <= total(by_cols) else by_cols
+    return [(_indices(rows), _indices(cols)) for rows, cols in best]
+
+
+def cover_report(mask: np.ndarray, blocks: List[Block], limit: int) -> Dict[str, Any]:
+    """
+    Compares the cells a plan requests with the cells that are actually needed.
+    """
+    needed = int(mask.sum())
+    requested = sum(len(rows) * len(cols) for rows, cols in blocks)
+    requests = 0
+    for rows, cols in blocks:
+        tile_rows, tile_cols = tile_shape(len(rows), len(cols), limit)
+        requests += math.ceil(len(rows) / tile_rows) * math.ceil(len(cols) / tile_cols)
+
+    return {
+        "needed": needed,
+        "requested": requested,
+        "requests": requests,
+        "blocks": len(blocks),
+        "efficiency": needed / requested if requested else 1.0,
+    }
+
+
+def record_cover(report: Dict[str, Any]):
+    with _totals_lock:
+        for key in _totals:
+            _totals[key] += report[key]
+
+
+def cover_totals() -> Dict[str, Any]:
+    """
+    :return: Needed vs requested matrix elements summed over every fetch since start-up.
+    """
+    with _totals_lock:
+        totals = dict(_totals)
+    totals["efficiency"] = totals["needed"] / totals["requested"] if totals["requested"] else 1.0
+    return totals
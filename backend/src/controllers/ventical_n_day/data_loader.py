@@ -152,7 +152,8 @@ class DataLoader:
         places_order = [accommodation_id] * self.get_days() + activity_ids
         with MariaDB_Adaptor() as session:
             durationMatrix = DurationMatrix(session, locs, places_order)
-        return places_order, durationMatrix.get_duration_matrix()
+            duration_matrix = durationMatrix.get_duration_matrix()
+            return places_order, duration_matrix, durationMatrix.estimated_pairs
 
     def get_durations(self, place_orders):
         result = []
@@ -0,0 +1,86 @@
+# duration_estimator.py
+import logging
+import threading
+import time
+
+import numpy as np
+
+from common.geo import haversine_km, haversine_matrix_km
+
+
+class DurationEstimator:
+    """
+    Estimates travel durations from great-circle distance with a linear model,
+    seconds = intercept + seconds_per_km * km, fitted on durations already stored in the Duration table.
+    """
+
+    # Until calibrated: the 45 km/h fallback speed used for MapBox requests and a 1.3 road detour factor
+    DEFAULT_SECONDS_PER_KM = 1.3 * 3600 / 45
+    MIN_SAMPLES = 10
+
+    def __init__(self, sample_size: int = 5000, recalibrate_after: float = 24 * 60 * 60):
+        self.sample_size = sample_size
+        self.recalibrate_after = recalibrate_after
+
+        self.intercept = 0.0
+        self.seconds_per_km = DurationEstimator.DEFAULT_SECONDS_PER_KM
+        self.calibrated_at = None
+        self._lock = threading.Lock()
+
+    def ensure_calibrated(self, adaptor):
+        """
+        Fits the model on stored durations unless it was (attempted to be) fitted recently.
+
+        :param adaptor: MariaDB_Adaptor used to sample the Duration table.
+        """
+        with self._lock:
+            if self.calibrated_at is not None and time.monotonic() - self.calibrated_at < self.recalibrate_after:
+                return
+            # Set before fitting so a failing database is not queried again on every estimate
+            self.calibrated_at = time.monotonic()
+
+        try:
+            self.fit(adaptor.fetch_duration_samples(self.sample_size))
+        except Exception as e:
+            logging.warning(f"Could not calibrate duration estimator, keeping previous model: {e}")
+
+    def fit(self, samples):
+        """
+        :param samples: Rows of (duration seconds, source lat, source lon, destination lat, destination lon).
+        """
+        data = np.asarray(samples, dtype=np.float64).reshape(-1, 5)
+        data = data[~np.isnan(data).any(axis=1)]
+        if len(data) < DurationEstimator.MIN_SAMPLES:
+            logging.info(f"Only {len(data)} duration samples, keeping the default estimator.")
+            return
+
+        km = haversine_km(data[:, 1], data[:, 2], data[:, 3], data[:, 4])
+        design = np.column_stack([np.ones_like(km), km])
+        (intercept, seconds_per_km), *_ = np.linalg.lstsq(design, data[:, 0], rcond=None)
+
+        if seconds_per_km <= 0:
+            logging.warning("Calibrated duration slope is not positive, keeping previous model.")
+            return
+
+        self.intercept = max(0.0, float(intercept))
+        self.seconds_per_km = float(seconds_per_km)
+        logging.info(
+            f"Calibrated duration estimator on {len(data)} pairs: {self.intercept:.0f}s + {self.seconds_per_km:.1f}s/km."
+        )
+
+    def estimate_seconds(self, source_coords, destination_coords) -> np.ndarray:
+        """
+        :param source_coords: Sequence of (longitude, latitude).
+        :param destination_coords: Sequence of (longitude, latitude).
+        :return: Matrix of estimated durations in seconds.
+        """
+        return self.intercept + self.seconds_per_km * haversine_matrix_km(source_coords, destination_coords)
+
+    def estimate_quarters(self, source_coords, destination_coords, unknown: int = 8) -> np.ndarray:
+        """
+        Estimated durations in quarter hours, rounded up like transform_sec_to_int.
+        Places without coordinates get `unknown` quarters.
+        """
+        quarters = np.ceil(self.estimate_seconds(source_coords, destination_coords) / (60 * 15))
+        quarters[np.isnan(quarters)] = unknown
+        return quarters.astype(np.int32)
@@ -1,163 +1,265 @@
 # duration_matrix.py
 import logging
-import math
+import os
+import time
+import numpy as np
 from adapters.MariaDB import MariaDB_Adaptor
-from adapters.MapBox import MapBox
+from adapters.MapBox import MapBox, matrix_coordinate_limit
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from typing import List, Tuple
-from itertools import product
 
+from common.circuit_breaker import CircuitBreaker
+from common.duration_store import DURATION_STORE, MISSING
+from common.lru_cache import DURATION_PAIR_CACHE
 from common.utils import transform_sec_to_int
+from controllers.ventical_n_day.block_cover import cover_report, plan_block_cover, record_cover
+from controllers.ventical_n_day.duration_estimator import DurationEstimator
+
+# Seconds a solve waits for MapBox before estimating the missing durations instead
+MAPBOX_FETCH_BUDGET = float(os.getenv("MAPBOX_FETCH_BUDGET", 10))
+_MAPBOX_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="mapbox-matrix")
 
 class DurationMatrix:
     MAPBOX_ADAPTOR = MapBox()
-    
+    MAPBOX_BREAKER = CircuitBreaker("mapbox-matrix", slow_call_seconds=MAPBOX_FETCH_BUDGET / 2)
+    ESTIMATOR = DurationEstimator()
+    PAIR_CACHE = DURATION_PAIR_CACHE
+    STORE = DURATION_STORE
+
     def __init__(self, adaptor: MariaDB_Adaptor, locations, order):
         self.adaptor = adaptor
-        
+
         self.locations = locations
         self.order = order
-    
-    def _create_matrix(self, rows: int, cols: int, default: float = 0.0) -> (List[List[float]]):
+
+        # Matrix rows/columns follow the unique location keys
+        self.keys = list(locations.keys())
+        self.key_index = {key: index for index, key in enumerate(self.keys)}
+
+        # (source_id, destination_id) cells filled by the estimator, reported with the solve result;
+        # they stay missing in the store and are fetched from MapBox again on a later solve
+        self.estimated_pairs: List[Tuple[str, str]] = []
+
+    def _create_matrix(self, size: int) -> np.ndarray:
+        """
+        Creates a square int32 matrix with every off-diagonal cell marked as missing.
+
+        :param size: Number of rows and columns.
+        :return: 2D ndarray.
         """
-        Creates a 2D matrix initialized with a default value.
+        matrix = np.full((size, size), MISSING, dtype=np.int32)
+        np.fill_diagonal(matrix, 0)
+        return matrix
 
-        :param rows: Number of rows.
-        :param cols: Number of columns.
-        :param default: Default value for each cell.
-        :return: 2D list representing the matrix.
+    def _populate_from_store(self, matrix: np.ndarray) -> np.ndarray:
         """
-        return [[default for _ in range(cols)] for _ in range(rows)]
-    
-    def _generate_pairs(self, place_ids: List[str]) -> (List[Tuple[str, str]]):
+        Copies every duration the memory-mapped store holds for these places into the matrix.
         """
-        Generates all possible source-destination pairs, excluding self-pairs.
+        if not DurationMatrix.STORE.refresh():
+            return matrix
 
-        :param place_ids: List of place_ids.
-        :return: List of (source_id, destination_id) tuples.
+        stored = DurationMatrix.STORE.submatrix(self.keys)
+        np.copyto(matrix, stored, where=stored != MISSING)
+        return matrix
+
+    def _fetch_known_durations(self, pairs: List[Tuple[str, str]]) -> (List[Tuple[str, str, int]]):
         """
-        return [
-            (source, destination)
-            for source, destination in product(place_ids, repeat=2)
-            if source != destination
-        ]
-        
-    def _populate_known_durations(self, matrix, pairs, keys: List):
-        for source, destination, duration in pairs:
-            matrix[keys.index(source)][keys.index(destination)] = duration
-            
-        for key_idx in range(len(keys)):
-            matrix[key_idx][key_idx] = 0
-            
+        Looks up durations in the pair cache first and fetches only the remaining pairs from the database.
+
+        :param pairs: List of (source_id, destination_id) tuples.
+        :return: List of (source_id, destination_id, duration) tuples that are known.
+        """
+        cached = DurationMatrix.PAIR_CACHE.get_many(pairs)
+        logging.debug(f"Found {len(cached)} of {len(pairs)} duration pairs in the cache.")
+
+        uncached_pairs = [pair for pair in pairs if pair not in cached]
+        fetched = self.adaptor.fetch_durations(uncached_pairs)
+        DurationMatrix.PAIR_CACHE.put_many(((source, destination), duration) for source, destination, duration in fetched)
+
+        return [(source, destination, duration) for (source, destination), duration in cached.items()] + fetched
+
+    def _populate_known_durations(self, matrix: np.ndarray, pairs) -> np.ndarray:
+        """
+        Writes (source_id, destination_id, duration) tuples into the matrix with one scatter assignment.
+        """
+        if not pairs:
+            return matrix
+
+        sources, destinations, durations = zip(*pairs)
+        rows = np.fromiter((self.key_index[source] for source in sources), dtype=np.intp, count=len(pairs))
+        cols = np.fromiter((self.key_index[destination] for destination in destinations), dtype=np.intp, count=len(pairs))
+        matrix[rows, cols] = durations
+
         return matrix
-    
-    def _identify_missing_pairs(self, matrix, keys):
-        pairs = []
-        
-        for row in range(len(matrix)):
-            for col in range(len(matrix)):
-                if matrix[row][col] == -1:
-                    pairs.append((keys[row], keys[col]))
-                    
-        return pairs
-                 
-    def _get_col_idx(self, matrix, index):
-        return [row[index] for row in matrix]   
-    
+
+    def _mask_to_pairs(self, mask: np.ndarray) -> (List[Tuple[str, str]]):
+        rows, cols = np.nonzero(mask)
+        return [(self.keys[row], self.keys[col]) for row, col in zip(rows.tolist(), cols.tolist())]
+
+    def _identify_missing_pairs(self, matrix: np.ndarray) -> (List[Tuple[str, str]]):
+        return self._mask_to_pairs(matrix == MISSING)
+
     def _fetch_duration_matrix_api(self, pairs):
-        
+        """
+        Fetches the missing pairs as a small set of source x destination blocks planned to minimise
+        billed elements and requests, instead of the full cross product of every source and destination.
+
+        :return: List of (source_id, destination_id, seconds) tuples; MapBox returns null for unroutable pairs.
+        """
         # list of sources and destinations
-        sources = sorted(set(self._get_col_idx(pairs, 0)))
-        destinations = sorted(set(self._get_col_idx(pairs, 1)))
-        
-        places = sorted(set(sources + destinations))
-        
-        # fetch coordinates
-        coords = [self.locations[place] for place in places]
-        
-        source_indices = [places.index(source) for source in sources]
-        destination_indices = [places.index(destination) for destination in destinations]
-        
-        return places, source_indices, destination_indices, DurationMatrix.MAPBOX_ADAPTOR.fetch_matrix_api(
-            "mapbox/driving", 
-            "duration", 
-            "curb", 
-            45, 
-            coords, 
-            source_indices, 
-            destination_indices)
-        
-    def _get_duration_pairs(self, places_order, source_indices, destination_indices, duration_matrix):
-        result = []
-        
-        for i, row in enumerate(duration_matrix):
-            for j, col in enumerate(row):
-                source_index = source_indices[i]
-                destination_index = destination_indices[j]
-                result.append((places_order[source_index], places_order[destination_index], col))
-                
-        return result
-       
-    def _reorder_matrix(self, matrix, matrix_keys: List):
-        matrix_size = len(self.order)
-        
-        new_matrix = self._create_matrix(matrix_size, matrix_size, 0)
-        
-        matrix_indices = { key: index for index, key in enumerate(matrix_keys) }
-        new_matrix_indices = { index: key for index, key in enumerate(self.order) }
-            
-        for i in range(matrix_size):
-            for j in range(matrix_size):
-                source = new_matrix_indices[i]
-                destination = new_matrix_indices[j]
-                source_index = matrix_indices[source]
-                destination_index = matrix_indices[destination]
-                
-                new_matrix[i][j] = matrix[source_index][destination_index]
-                
-        return new_matrix
-        
-        
-    def get_duration_matrix(self):
+        sources = sorted({source for source, _ in pairs})
+        destinations = sorted({destination for _, destination in pairs})
+
+        source_index = {source: index for index, source in enumerate(sources)}
+        destination_index = {destination: index for index, destination in enumerate(destinations)}
+        mask = np.zeros((len(sources), len(destinations)), dtype=bool)
+        mask[
+            [source_index[source] for source, _ in pairs],
+            [destination_index[destination] for _, destination in pairs],
+        ] = True
+
+        limit = matrix_coordinate_limit("mapbox/driving")
+        blocks = plan_block_cover(mask, limit)
+        report = cover_report(mask, blocks, limit)
+        record_cover(report)
+        logging.info(
+            f"Requesting {report['requested']} matrix elements in {report['requests']} requests for {report['needed']} missing pairs."
+        )
+
+        block_sources = [[sources[row] for row in rows.tolist()] for rows, _ in blocks]
+        block_destinations = [[destinations[col] for col in cols.tolist()] for _, cols in blocks]
+        matrices = DurationMatrix.MAPBOX_ADAPTOR.fetch_matrix_blocks(
+            "mapbox/driving",
+            "duration",
+            "curb",
+            45,
+            [
+                (
+                    [self.locations[source] for source in block_source],
+                    [self.locations[destination] for destination in block_destination],
+                )
+                for block_source, block_destination in zip(block_sources, block_destinations)
+            ],
+        )
+
+        # Cells outside the missing set come with the blocks at no extra request, they are kept as well
+        return [
+            (source, destination, duration)
+            for block_source, block_destination, matrix in zip(block_sources, block_destinations, matrices)
+            for source, row in zip(block_source, matrix)
+            for destination, duration in zip(block_destination, row)
+            if duration is not None and source != destination
+        ]
+
+    def _fetch_missing_from_api(self, missing_pairs):
+        """
+        Fetches missing durations from MapBox behind the circuit breaker and the MAPBOX_FETCH_BUDGET deadline.
+
+        :return: List of (source_id, destination_id, seconds) tuples, or None when MapBox was skipped or failed.
+        """
+        if not DurationMatrix.MAPBOX_BREAKER.allow_request():
+            logging.warning("MapBox circuit breaker is open, estimating missing durations.")
+            return None
+
+        started = time.monotonic()
+        future = _MAPBOX_EXECUTOR.submit(self._fetch_duration_matrix_api, missing_pairs)
+        try:
+            pairs = future.result(timeout=MAPBOX_FETCH_BUDGET)
+        except FuturesTimeoutError:
+            DurationMatrix.MAPBOX_BREAKER.record_failure()
+            # A late response still warms the pair cache for the next solve
+            future.add_done_callback(DurationMatrix._cache_late_result)
+            logging.warning(f"MapBox did not answer within {MAPBOX_FETCH_BUDGET}s, estimating missing durations.")
+            return None
+        except Exception as e:
+            DurationMatrix.MAPBOX_BREAKER.record_failure()
+            logging.warning(f"MapBox matrix fetch failed, estimating missing durations: {e}")
+            return None
+
+        DurationMatrix.MAPBOX_BREAKER.record_success(time.monotonic() - started)
+        return pairs
+
+    @staticmethod
+    def _cache_late_result(future):
+        if future.cancelled() or future.exception() is not None:
+            return
+
+        DurationMatrix.PAIR_CACHE.put_many(
+            ((source, destination), transform_sec_to_int(duration))
+            for source, destination, duration in future.result()
+        )
+
+    def _estimate_missing_durations(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        Fills the cells still marked as missing with great-circle estimates. Estimates are neither
+        stored nor cached, so the pairs stay missing and are fetched again once MapBox recovers.
+        """
+        missing = matrix == MISSING
+
+        DurationMatrix.ESTIMATOR.ensure_calibrated(self.adaptor)
+        coords = [self.locations[key] for key in self.keys]
+        estimated = DurationMatrix.ESTIMATOR.estimate_quarters(coords, coords)
+
+        matrix[missing] = estimated[missing]
+        self.estimated_pairs = self._mask_to_pairs(missing)
+        logging.warning(f"Estimated {len(self.estimated_pairs)} durations from great-circle distance.")
+
+        return matrix
+
+    def _reorder_matrix(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        Expands the matrix to the requested place order (accommodation repeated per day) with fancy indexing.
+        """
+        order_index = np.fromiter((self.key_index[key] for key in self.order), dtype=np.intp, count=len(self.order))
+        return np.ascontiguousarray(matrix[np.ix_(order_index, order_index)])
+
+
+    def get_duration_matrix(self) -> np.ndarray:
         logging.debug("Starting duration matrix generation.")
-        
+
         count_locs = len(self.locations)
         if count_locs == 0:
             logging.warning("No locations provided. Returning an empty matrix.")
-            return []
+            return np.empty((0, 0), dtype=np.int32)
 
         logging.debug(f"Number of locations: {count_locs}")
-        
-        negative_matrix = self._create_matrix(count_locs, count_locs, -1)
 
-        all_pairs = self._generate_pairs(self.order)
-        logging.debug(f"Generated all pairs: {all_pairs}")
+        negative_matrix = self._create_matrix(count_locs)
+
+        negative_matrix = self._populate_from_store(negative_matrix)
 
-        existed_pairs = self.adaptor.fetch_durations(all_pairs)
-        logging.debug(f"Fetched {len(existed_pairs)} existing duration pairs from the database.")
+        unstored_pairs = self._identify_missing_pairs(negative_matrix)
+        logging.debug(f"{len(unstored_pairs)} duration pairs are not in the duration store.")
 
-        filled_matrix = self._populate_known_durations(negative_matrix, existed_pairs, list(self.locations.keys()))
+        existed_pairs = self._fetch_known_durations(unstored_pairs)
+        logging.debug(f"Fetched {len(existed_pairs)} existing duration pairs from the cache and database.")
 
-        missing_pairs = self._identify_missing_pairs(filled_matrix, list(self.locations.keys()))
+        filled_matrix = self._populate_known_durations(negative_matrix, existed_pairs)
+
+        missing_pairs = self._identify_missing_pairs(filled_matrix)
         logging.debug(f"Identified {len(missing_pairs)} missing duration pairs.")
 
         if missing_pairs:
             logging.debug("Fetching missing durations from the external API.")
-            
-            places_order, source_indices, destination_indices, duration_matrix = self._fetch_duration_matrix_api(missing_pairs)
-            logging.debug("Successfully fetched missing durations from the external API.")
-
-            pairs = self._get_duration_pairs(places_order, source_indices, destination_indices, duration_matrix)
-            logging.debug(f"Fetched and organized {len(pairs)} duration pairs from the API.")
-                
-            self.adaptor.upsert_durations(pairs)
-            logging.debug("Inserted/Updated duration pairs into the database.")
-            
-            pairs = [(e[0], e[1], transform_sec_to_int(e[2])) for e in pairs]
-            
-            filled_matrix = self._populate_known_durations(filled_matrix, pairs, list(self.locations.keys()))
-
-        final_matrix = self._reorder_matrix(filled_matrix, list(self.locations.keys()))
+
+            pairs = self._fetch_missing_from_api(missing_pairs)
+
+            if pairs:
+                logging.debug(f"Fetched and organized {len(pairs)} duration pairs from the API.")
+
+                self.adaptor.upsert_durations(pairs)
+                logging.debug("Inserted/Updated duration pairs into the database.")
+
+                pairs = [(e[0], e[1], transform_sec_to_int(e[2])) for e in pairs]
+                DurationMatrix.PAIR_CACHE.put_many(((e[0], e[1]), e[2]) for e in pairs)
+
+                filled_matrix = self._populate_known_durations(filled_matrix, pairs)
+                np.fill_diagonal(filled_matrix, 0)
+
+            if (filled_matrix == MISSING).any():
+                filled_matrix = self._estimate_missing_durations(filled_matrix)
+
+        final_matrix = self._reorder_matrix(filled_matrix)
         logging.debug("Successfully reordered the duration matrix.")
 
         return final_matrix
-    
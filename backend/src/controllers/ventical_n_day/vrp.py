@@ -2,6 +2,8 @@ import json
 import os
 import sys
 from typing import Dict
+
+import numpy as np
 from ortools.constraint_solver import routing_enums_pb2, pywrapcp
 
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
@@ -27,8 +29,9 @@ class VRPSolver:
             "depot": 0,
         }
 
-        place_ids, duration_matrix = self.data_loader.get_duration_matrix()
+        place_ids, duration_matrix, estimated_pairs = self.data_loader.get_duration_matrix()
         data["place_ids"] = place_ids
+        data["estimated_pairs"] = estimated_pairs
         data["time_windows"] = self.data_loader.get_active_times(place_ids)
         data["time_matrix"] = duration_matrix
         data["time_services"] = self.data_loader.get_durations(place_ids)
@@ -68,7 +71,7 @@ class VRPSolver:
                 service_time = self.data["time_services"][node_index]
                 departure_time = arrival_time + service_time
 
-                travel_time = (self.data["time_matrix"][route[-1]["index"]][node_index] 
+                travel_time = (int(self.data["time_matrix"][route[-1]["index"]][node_index])
                                if route else 0)
                 waiting_time = max(0, arrival_time - (previous_departure_time + travel_time)) if route else 0
                 previous_departure_time = departure_time
@@ -89,7 +92,7 @@ class VRPSolver:
             node_index = self.manager.IndexToNode(index)
             arrival_time = self.solution.Value(time_dimension.CumulVar(index))
             node = self.data["place_ids"][node_index]
-            travel_time = (self.data["time_matrix"][route[-1]["index"]][node_index] if route else 0)
+            travel_time = (int(self.data["time_matrix"][route[-1]["index"]][node_index]) if route else 0)
             waiting_time = max(0, arrival_time - (previous_departure_time + travel_time)) if route else 0
 
             node_info = {
@@ -106,7 +109,14 @@ class VRPSolver:
             total_waiting_time += sum([node["waiting_time"] for node in route])
             all_routes.append(route)
             
-        return {"routes": all_routes, "total_time": total_time, "total_waiting_time": total_waiting_time}
+        # Travel times between these places are great-circle estimates, MapBox was unavailable
+        estimated_durations = len(self.data["estimated_pairs"])
+        return {
+            "routes": all_routes,
+            "total_time": total_time,
+            "total_waiting_time": total_waiting_time,
+            "estimated_durations": estimated_durations,
+        }
 
     def print_routes(self, computed_routes):
         """Prints the computed routes in a human-readable format."""
@@ -133,12 +143,12 @@ class VRPSolver:
         )
         self.routing = pywrapcp.RoutingModel(self.manager)
 
-        def time_callback(from_index, to_index):
-            from_node, to_node = self.manager.IndexToNode(from_index), self.manager.IndexToNode(to_index)
-            travel_time = self.data["time_matrix"][from_node][to_node] + self.data["time_services"][from_node]
-            return travel_time
-
-        transit_callback_index = self.routing.RegisterTransitCallback(time_callback)
+        # travel time plus service time at the origin, evaluated inside the solver instead of a Python callback
+        transit_matrix = (
+            np.asarray(self.data["time_matrix"], dtype=np.int64)
+            + np.asarray(self.data["time_services"], dtype=np.int64)[:, np.newaxis]
+        )
+        transit_callback_index = self.routing.RegisterTransitMatrix(transit_matrix.tolist())
         self.routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
 
         self.routing.AddDimension(transit_callback_index, 96, 96 * self.data["days"], False, "Time")
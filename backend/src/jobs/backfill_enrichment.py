@@ -0,0 +1,106 @@
+"""
+Backfills the description and NER tags of catalog places ahead of time, so
+fetch_place_detail no longer enriches them while the user waits.
+
+Activities and accommodations without a description are read in id-ordered blocks.
+Each block runs the same summarize_description and NER prompt chains as the chatbot,
+--concurrency places at a time under a requests-per-minute token bucket. The results
+are written with one UPDATE per block and the last processed id is checkpointed, so an
+interrupted run resumes where it stopped. Places whose LLM calls failed keep a NULL
+description and are picked up again by a run with --reset.
+
+Usage (from the backend directory):
+    python src/jobs/backfill_enrichment.py
+    python src/jobs/backfill_enrichment.py --kind activity --concurrency 16 --requests-per-minute 1000
+"""
+import argparse
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from adapters.MariaDB import MariaDB_Adaptor
+from common.checkpoint import load_checkpoint, save_checkpoint
+from common.concurrency import TokenBucket
+from common.enrichment import build_enrichment_chains, create_chat_llm
+from common.mariadb_schema import Activity, Accommodation
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+KINDS = {"activity": Activity, "accommodation": Accommodation}
+
+
+class EnrichmentBackfill:
+    def __init__(self, args):
+        self.args = args
+        self.checkpoint = {} if args.reset else load_checkpoint(args.checkpoint)
+        self.last_ids = self.checkpoint.setdefault("last_ids", {})
+
+        requests_per_minute = args.requests_per_minute or int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", 500))
+        self.rate_limiter = TokenBucket(rate=requests_per_minute / 60, capacity=args.concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="enrichment")
+
+        # The chatbot's model and prompt chains, built by the same helper
+        self.chain_description, self.chain_ner = build_enrichment_chains(create_chat_llm())
+        self.mariadb_adaptor = None
+
+    def enrich(self, place_id, tag):
+        """
+        :return: Column updates of the place, None if an LLM call failed.
+        """
+        try:
+            self.rate_limiter.acquire()
+            description = self.chain_description.invoke({"des": tag})
+            self.rate_limiter.acquire()
+            ner = self.chain_ner.invoke({"text": tag})
+        except Exception as e:
+            logger.warning(f"Could not enrich {place_id}: {e}")
+            return None
+        return {"id": place_id, "description": description, "about_and_tags": ner}
+
+    def backfill(self, kind, table):
+        enriched = failed = 0
+        while True:
+            block = self.mariadb_adaptor.fetch_unenriched_places(
+                table, after_id=self.last_ids.get(kind), limit=self.args.block_size
+            )
+            if not block:
+                break
+
+            rows = [row for row in self.executor.map(lambda place: self.enrich(*place), block) if row is not None]
+            self.mariadb_adaptor.update_places(table, rows)
+            enriched += len(rows)
+            failed += len(block) - len(rows)
+
+            self.last_ids[kind] = block[-1][0]
+            save_checkpoint(self.args.checkpoint, self.checkpoint)
+            logger.info(f"Enriched {enriched} {kind} places, {failed} failed.")
+
+    def __call__(self):
+        try:
+            with MariaDB_Adaptor() as self.mariadb_adaptor:
+                for kind in [self.args.kind] if self.args.kind else KINDS:
+                    self.backfill(kind, KINDS[kind])
+        finally:
+            self.executor.shutdown()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kind", choices=KINDS.keys(), help="backfill one kind only")
+    parser.add_argument("--block-size", type=int, default=100, help="places per bulk update and checkpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="places enriched in parallel")
+    parser.add_argument("--requests-per-minute", type=int, help="LLM request quota, defaults to OPENAI_REQUESTS_PER_MINUTE")
+    parser.add_argument("--checkpoint", default="backfill_enrichment.checkpoint.json")
+    parser.add_argument("--reset", action="store_true", help="ignore an existing checkpoint")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    EnrichmentBackfill(parse_args())()
@@ -0,0 +1,53 @@
+"""
+Rebuilds the memory-mapped duration store from the Duration table.
+
+Every Place gets a matrix index in place_key order; durations are streamed from
+MariaDB into a new int16 matrix file and the sidecar is swapped atomically, so
+running workers switch to the new store on their next solve.
+
+Usage (from the backend directory):
+    python src/jobs/export_duration_store.py
+    python src/jobs/export_duration_store.py --path /var/lib/ventical/durations.json
+"""
+import argparse
+import logging
+import os
+import sys
+
+from dotenv import load_dotenv
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from adapters.MariaDB import MariaDB_Adaptor
+from common.duration_store import export_duration_store
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def export(path: str):
+    with MariaDB_Adaptor() as adaptor:
+        place_keys = adaptor.fetch_all_place_keys()
+        key_index = {place_key: index for index, (place_key, _) in enumerate(place_keys)}
+
+        durations = (
+            (key_index[source_key], key_index[destination_key], duration_q)
+            for source_key, destination_key, duration_q in adaptor.iter_all_durations()
+            if source_key in key_index and destination_key in key_index
+        )
+        export_duration_store(path, [place_id for _, place_id in place_keys], durations)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default=os.getenv("DURATION_STORE_PATH"), help="sidecar path, defaults to DURATION_STORE_PATH")
+
+    args = parser.parse_args()
+    if not args.path:
+        parser.error("--path or DURATION_STORE_PATH is required")
+    return args
+
+
+if __name__ == "__main__":
+    export(parse_args().path)
@@ -0,0 +1,97 @@
+"""
+Exports Activity_Embedded / Accommodation_Embedded from Weaviate for the in-process
+retrieval backend (RETRIEVAL_BACKEND=local).
+
+Every object is written with its vector and the MariaDB id, read from the id property
+of reindexed collections or else resolved through the bridge collection. The sidecar
+of each collection is swapped atomically, so running workers load the new export on
+their next query.
+
+Usage (from the backend directory):
+    python src/jobs/export_local_index.py
+    python src/jobs/export_local_index.py --kind activity --dir /var/lib/ventical/local_index
+"""
+import argparse
+import logging
+import os
+import sys
+
+from dotenv import load_dotenv
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from adapters.Weaviate import Weaviate_Adapter
+from common.local_index import export_local_collection
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+KINDS = {
+    "activity": {"embedded": "Activity_Embedded", "bridge": "Activity_Bridge", "id_property": "activity_id"},
+    "accommodation": {
+        "embedded": "Accommodation_Embedded",
+        "bridge": "Accommodation_Bridge",
+        "id_property": "accommodation_id",
+    },
+}
+PROPERTIES = ["name", "about_and_tags", "latitude", "longitude"]
+_BRIDGE_CHUNK_SIZE = 200
+
+
+def _object_vector(obj):
+    vector = obj.vector
+    return vector["default"] if isinstance(vector, dict) and "default" in vector else vector
+
+
+def export(kind, weaviate_adapter, directory):
+    config = KINDS[kind]
+    id_property = config["id_property"]
+
+    collection = weaviate_adapter.get_collections(config["embedded"])
+    embeds_id = weaviate_adapter.has_property(collection, id_property)
+
+    objects = []
+    for obj in collection.iterator(
+        include_vector=True, return_properties=PROPERTIES + ([id_property] if embeds_id else [])
+    ):
+        objects.append(({key: obj.properties.get(key) for key in PROPERTIES + [id_property]}, _object_vector(obj)))
+
+    unresolved = [properties["name"] for properties, _ in objects if not properties.get(id_property)]
+    ids = {}
+    for start in range(0, len(unresolved), _BRIDGE_CHUNK_SIZE):
+        ids.update(
+            weaviate_adapter.resolve_bridge_ids(
+                config["bridge"], "name", id_property, unresolved[start:start + _BRIDGE_CHUNK_SIZE]
+            )
+        )
+
+    missing = 0
+    for properties, _ in objects:
+        if not properties.get(id_property):
+            properties[id_property] = ids.get(properties["name"])
+            missing += properties[id_property] is None
+    if missing:
+        logger.warning(f"{missing} objects of {config['embedded']} have no MariaDB id.")
+
+    export_local_collection(directory, config["embedded"], objects)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kind", choices=KINDS.keys(), help="export one kind only")
+    parser.add_argument("--dir", default=os.getenv("LOCAL_INDEX_DIR"), help="export directory, defaults to LOCAL_INDEX_DIR")
+
+    args = parser.parse_args()
+    if not args.dir:
+        parser.error("--dir or LOCAL_INDEX_DIR is required")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    weaviate_adapter = Weaviate_Adapter()
+    with weaviate_adapter.connection():
+        for kind in [args.kind] if args.kind else KINDS:
+            export(kind, weaviate_adapter, args.dir)
@@ -0,0 +1,237 @@
+"""
+Streams activity/accommodation catalog files into MariaDB and Weaviate.
+
+Records are read one at a time, upserted into the Activity/Accommodation tables in
+batches and batch-imported into the *_Embedded and *_Bridge Weaviate collections
+under deterministic uuids, so re-running a file is idempotent. Progress is
+checkpointed after every batch and an interrupted run resumes where it stopped.
+
+Input layouts:
+- {"activities": [...], "accommodations": [...]};
+- a JSON array or a .jsonl file of one kind, selected with --kind.
+
+Records without latitude and longitude cannot be placed in the catalog or planned into
+routes; they are skipped and counted. The frontend sample rdsf.json carries no
+coordinates at all and is therefore not an ingestible source.
+
+Usage (from the backend directory):
+    python src/jobs/ingest_catalog.py catalog.json
+    python src/jobs/ingest_catalog.py activities.jsonl --kind activity --batch-size 1000
+"""
+import argparse
+import datetime
+import logging
+import os
+import sys
+
+from dotenv import load_dotenv
+from weaviate.util import generate_uuid5
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from adapters.MariaDB import MariaDB_Adaptor
+from adapters.Weaviate import Weaviate_Adapter
+from common.checkpoint import load_checkpoint, save_checkpoint
+from common.json_stream import iter_json_lines, iter_json_records
+from common.mariadb_schema import Activity, Accommodation
+from common.utils import transform_time_to_int
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+KINDS = {
+    "activity": {
+        "table": Activity,
+        "sections": ("activities", "activity"),
+        "embedded": "Activity_Embedded",
+        "bridge": "Activity_Bridge",
+        "id_property": "activity_id",
+    },
+    "accommodation": {
+        "table": Accommodation,
+        "sections": ("accommodations", "accommodation"),
+        "embedded": "Accommodation_Embedded",
+        "bridge": "Accommodation_Bridge",
+        "id_property": "accommodation_id",
+    },
+}
+
+EMBEDDED_PROPERTIES = ("name", "about_and_tags", "latitude", "longitude")
+
+
+def parse_time(value):
+    if value is None or isinstance(value, datetime.time):
+        return value
+    return datetime.time.fromisoformat(str(value))
+
+
+def quarter_to_time(quarter: int) -> datetime.time:
+    if quarter >= 96:
+        return datetime.time(23, 59)
+    minutes = quarter * 15
+    return datetime.time(minutes // 60, minutes % 60)
+
+
+def to_row(record, table):
+    """
+    Maps an input record onto every column of the table. Lists are stored as their
+    string representation, matching what convert_string_to_list reads back.
+    """
+    record = dict(record)
+    if "image" in record and "image_url" not in record:
+        record["image_url"] = record.pop("image")
+    if "tag" in record and "about_and_tags" not in record:
+        record["about_and_tags"] = record.pop("tag")
+
+    business_hour = record.pop("business_hour", None)
+    if isinstance(business_hour, dict) and "start_time" not in record:
+        record["start_time"] = quarter_to_time(business_hour.get("start", 0))
+        record["end_time"] = quarter_to_time(business_hour.get("end", 96))
+
+    row = {}
+    for column in table.__table__.columns.keys():
+        value = record.get(column)
+        if isinstance(value, (list, dict)):
+            value = str(value)
+        row[column] = value
+
+    row["start_time"] = parse_time(row["start_time"])
+    row["end_time"] = parse_time(row["end_time"])
+    row["start_q"], row["end_q"] = transform_time_to_int(row["start_time"], row["end_time"])
+    return row
+
+
+def resolve_kind(section, default_kind):
+    if section is None:
+        return default_kind
+    for kind, config in KINDS.items():
+        if section in config["sections"]:
+            return kind
+    return None
+
+
+class CatalogIngestor:
+    def __init__(self, args):
+        self.args = args
+        self.checkpoint = {} if args.reset else load_checkpoint(args.checkpoint)
+        self.mariadb_adaptor = None
+        self.weaviate_adapter = None
+
+    def flush(self, kind, rows):
+        config = KINDS[kind]
+
+        if not self.args.skip_mariadb:
+            self.mariadb_adaptor.upsert_places(config["table"], rows)
+
+        if not self.args.skip_weaviate:
+            # Collections rebuilt by reindex_embedded.py carry the MariaDB id on the embedded object
+            embedded_properties = EMBEDDED_PROPERTIES
+            if self.weaviate_adapter.has_property(
+                self.weaviate_adapter.get_collections(config["embedded"]), config["id_property"]
+            ):
+                embedded_properties += (config["id_property"],)
+            embedded = (
+                (
+                    generate_uuid5(row["id"], config["embedded"]),
+                    {
+                        prop: row["id"] if prop == config["id_property"] else row[prop]
+                        for prop in embedded_properties
+                    },
+                )
+                for row in rows
+            )
+            bridge = (
+                (
+                    generate_uuid5(row["id"], config["bridge"]),
+                    {"name": row["name"], config["id_property"]: row["id"]},
+                )
+                for row in rows
+            )
+            for collection_name, objects in ((config["embedded"], embedded), (config["bridge"], bridge)):
+                failed = self.weaviate_adapter.batch_import(
+                    collection_name,
+                    objects,
+                    batch_size=self.args.weaviate_batch_size,
+                    concurrent_requests=self.args.weaviate_concurrency,
+                )
+                if failed:
+                    # Stop before checkpointing so the batch is retried on the next run
+                    raise RuntimeError(
+                        f"{len(failed)} objects failed to import into {collection_name}: {failed[0].message}"
+                    )
+
+        self.checkpoint[kind] = self.checkpoint.get(kind, 0) + len(rows)
+        save_checkpoint(self.args.checkpoint, self.checkpoint)
+        logger.info(f"Ingested {self.checkpoint[kind]} {kind} records.")
+
+    def run(self):
+        if self.args.path.endswith(".jsonl"):
+            reader = iter_json_lines
+        else:
+            reader = iter_json_records
+
+        seen = {kind: 0 for kind in KINDS}
+        skipped = {kind: 0 for kind in KINDS}
+        batches = {kind: [] for kind in KINDS}
+
+        with open(self.args.path, "r", encoding="utf-8") as file:
+            for section, record in reader(file):
+                kind = resolve_kind(section, self.args.kind)
+                if kind is None:
+                    continue
+
+                seen[kind] += 1
+                # Records up to the checkpoint were written by a previous run
+                if seen[kind] <= self.checkpoint.get(kind, 0):
+                    continue
+
+                row = to_row(record, KINDS[kind]["table"])
+                if row["latitude"] is None or row["longitude"] is None:
+                    skipped[kind] += 1
+                    continue
+
+                batches[kind].append(row)
+                if len(batches[kind]) >= self.args.batch_size:
+                    self.flush(kind, batches[kind])
+                    batches[kind] = []
+
+        for kind, rows in batches.items():
+            if rows:
+                self.flush(kind, rows)
+
+        for kind, count in skipped.items():
+            if count:
+                logger.warning(f"Skipped {count} {kind} records without latitude/longitude.")
+
+    def __call__(self):
+        if not self.args.skip_weaviate:
+            self.weaviate_adapter = Weaviate_Adapter()
+            self.weaviate_adapter.connect()
+        try:
+            with MariaDB_Adaptor() as self.mariadb_adaptor:
+                self.run()
+        finally:
+            if self.weaviate_adapter is not None:
+                self.weaviate_adapter.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="JSON, or .jsonl, catalog file")
+    parser.add_argument("--kind", choices=KINDS.keys(), help="record kind of a top-level array or .jsonl file")
+    parser.add_argument("--batch-size", type=int, default=500, help="records per MariaDB batch and checkpoint")
+    parser.add_argument("--weaviate-batch-size", type=int, default=100)
+    parser.add_argument("--weaviate-concurrency", type=int, default=2, help="concurrent Weaviate batch requests")
+    parser.add_argument("--checkpoint", help="checkpoint file, defaults to <path>.checkpoint.json")
+    parser.add_argument("--reset", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument("--skip-mariadb", action="store_true")
+    parser.add_argument("--skip-weaviate", action="store_true")
+
+    args = parser.parse_args()
+    args.checkpoint = args.checkpoint or f"{args.path}.checkpoint.json"
+    return args
+
+
+if __name__ == "__main__":
+    CatalogIngestor(parse_args())()
@@ -0,0 +1,158 @@
+"""
+Precomputes travel durations between catalog places so route requests find them in
+the Duration table instead of waiting on MapBox.
+
+Every activity and accommodation is paired with the places within --radius-km of it.
+Sources are processed in spatially ordered blocks: pairs already stored are skipped,
+the remaining ones are fetched as one tiled MapBox matrix (bounded by --concurrency
+and the MapBox rate limit) and bulk-loaded through upsert_durations. Completed sources
+are checkpointed after every block and an interrupted run resumes where it stopped.
+
+Usage (from the backend directory):
+    python src/jobs/precompute_durations.py
+    python src/jobs/precompute_durations.py --radius-km 30 --concurrency 8
+"""
+import argparse
+import logging
+import os
+import sys
+from typing import List
+
+import numpy as np
+from dotenv import load_dotenv
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from adapters.MapBox import MapBox
+from adapters.MariaDB import MariaDB_Adaptor
+from common.checkpoint import load_checkpoint, save_checkpoint
+from common.spatial_index import KM_PER_DEGREE, SpatialIndex
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def spatial_order(latitudes: np.ndarray, longitudes: np.ndarray, cell_km: float) -> np.ndarray:
+    """
+    Orders places by grid cell so consecutive sources share most of their destinations.
+
+    :return: Array of place indices.
+    """
+    cell = cell_km / KM_PER_DEGREE
+    return np.lexsort((np.floor(longitudes / cell), np.floor(latitudes / cell)))
+
+
+class DurationPrecomputer:
+    def __init__(self, args):
+        self.args = args
+        self.checkpoint = {} if args.reset else load_checkpoint(args.checkpoint)
+        self.done_sources = set(self.checkpoint.get("done_sources", []))
+        self.mapbox = MapBox(max_workers=args.concurrency, requests_per_minute=args.requests_per_minute)
+        self.mariadb_adaptor = None
+
+    def plan_block(self, block: List[str], index: SpatialIndex, locations):
+        """
+        Lists the (source_id, destination_id) pairs of a source block that lie within the radius
+        and are not stored yet.
+        """
+        pairs = [
+            (source, destination)
+            for source in block
+            for destination, _ in index.within_radius(locations[source][1], locations[source][0], self.args.radius_km)
+            if destination != source
+        ]
+
+        if pairs and not self.args.refresh:
+            known = {(source, destination) for source, destination, _ in self.mariadb_adaptor.fetch_durations(pairs)}
+            pairs = [pair for pair in pairs if pair not in known]
+
+        return pairs
+
+    def fetch_block(self, pairs, locations) -> int:
+        """
+        Fetches the matrix spanning the block's missing pairs and stores every routable cell.
+
+        :return: Tuple containing:
+                - Number of stored durations.
+                - Sources with requested pairs still missing, e.g. from a failed tile.
+        """
+        sources = sorted({source for source, _ in pairs})
+        destinations = sorted({destination for _, destination in pairs})
+
+        # Same request parameters as DurationMatrix so precomputed values match on-demand ones
+        matrix = self.mapbox.fetch_matrix_tiled(
+            "mapbox/driving",
+            "duration",
+            "curb",
+            45,
+            [locations[source] for source in sources],
+            [locations[destination] for destination in destinations],
+        )
+
+        # The tiles also cover pairs outside the radius, they are stored as well since they are already paid for
+        durations = [
+            (source, destination, duration)
+            for source, row in zip(sources, matrix)
+            for destination, duration in zip(destinations, row)
+            if source != destination and duration is not None
+        ]
+        self.mariadb_adaptor.upsert_durations(durations)
+
+        fetched = {(source, destination) for source, destination, _ in durations}
+        incomplete = {source for source, destination in pairs if (source, destination) not in fetched}
+        return len(durations), incomplete
+
+    def run(self):
+        places = self.mariadb_adaptor.fetch_place_coordinates()
+        if not places:
+            logger.warning("No places with coordinates found.")
+            return
+
+        place_ids = [place_id for place_id, _, _ in places]
+        latitudes = np.array([latitude for _, latitude, _ in places], dtype=np.float64)
+        longitudes = np.array([longitude for _, _, longitude in places], dtype=np.float64)
+        index = SpatialIndex(place_ids, latitudes, longitudes, cell_km=self.args.radius_km)
+        locations = {place_id: (lon, lat) for place_id, lon, lat in zip(place_ids, longitudes.tolist(), latitudes.tolist())}
+
+        order = spatial_order(latitudes, longitudes, self.args.radius_km)
+        pending = [place_ids[position] for position in order.tolist() if place_ids[position] not in self.done_sources]
+        logger.info(f"{len(pending)} of {len(places)} places left to precompute within {self.args.radius_km} km.")
+
+        stored = 0
+        for start in range(0, len(pending), self.args.block_size):
+            block = pending[start:start + self.args.block_size]
+
+            pairs = self.plan_block(block, index, locations)
+            incomplete = set()
+            if pairs:
+                block_stored, incomplete = self.fetch_block(pairs, locations)
+                stored += block_stored
+            if incomplete:
+                logger.warning(f"{len(incomplete)} sources have missing durations, they are retried on the next run.")
+
+            self.done_sources.update(source for source in block if source not in incomplete)
+            self.checkpoint["done_sources"] = sorted(self.done_sources)
+            save_checkpoint(self.args.checkpoint, self.checkpoint)
+            logger.info(
+                f"Precomputed {len(self.done_sources)} of {len(places)} sources, stored {stored} durations."
+            )
+
+    def __call__(self):
+        with MariaDB_Adaptor() as self.mariadb_adaptor:
+            self.run()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--radius-km", type=float, default=50.0, help="pair places at most this far apart")
+    parser.add_argument("--block-size", type=int, default=10, help="sources per MapBox matrix and checkpoint")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent MapBox tile requests")
+    parser.add_argument("--requests-per-minute", type=int, help="MapBox Matrix API quota, defaults to MAPBOX_MATRIX_REQUESTS_PER_MINUTE")
+    parser.add_argument("--refresh", action="store_true", help="refetch pairs that are already stored")
+    parser.add_argument("--checkpoint", default="precompute_durations.checkpoint.json")
+    parser.add_argument("--reset", action="store_true", help="ignore an existing checkpoint")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    DurationPrecomputer(parse_args())()
@@ -0,0 +1,172 @@
+"""
+Rebuilds Activity_Embedded / Accommodation_Embedded with the MariaDB id stored on
+every object, so retrieval reads ids from the search hits instead of the bridge.
+
+For each kind the job creates a new versioned collection with the schema of the one
+currently serving the name plus an activity_id / accommodation_id property, copies
+every object with its existing vector (nothing is re-vectorized) and the id of the
+matching MariaDB row, and finally points the collection name at the new collection
+through a single alias write. Readers switch within WEAVIATE_ALIAS_TTL seconds; the
+previous collection is kept unless --drop-old is given. If any source object has no
+vector, the new collection is deleted and the alias is left unchanged.
+
+An object is matched to its MariaDB row by the deterministic uuid written by
+ingest_catalog.py, else by name, choosing the closest row when a name repeats.
+
+Usage (from the backend directory):
+    python src/jobs/reindex_embedded.py
+    python src/jobs/reindex_embedded.py --kind activity --drop-old
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+
+from dotenv import load_dotenv
+from weaviate.classes.config import DataType, Property
+from weaviate.util import generate_uuid5
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from adapters.MariaDB import MariaDB_Adaptor
+from adapters.Weaviate import Weaviate_Adapter
+from common.geo import haversine_km
+from common.mariadb_schema import Activity, Accommodation
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+KINDS = {
+    "activity": {"table": Activity, "embedded": "Activity_Embedded", "id_property": "activity_id"},
+    "accommodation": {"table": Accommodation, "embedded": "Accommodation_Embedded", "id_property": "accommodation_id"},
+}
+
+
+class PlaceMatcher:
+    """Finds the MariaDB id of an embedded object."""
+
+    def __init__(self, rows, collection_name):
+        self.by_uuid = {str(generate_uuid5(place_id, collection_name)): place_id for place_id, _, _, _ in rows}
+        self.by_name = defaultdict(list)
+        for place_id, name, latitude, longitude in rows:
+            self.by_name[name].append((place_id, latitude, longitude))
+
+    def match(self, uuid, properties):
+        place_id = self.by_uuid.get(str(uuid))
+        if place_id is not None:
+            return place_id
+
+        candidates = self.by_name.get(properties.get("name"), [])
+        if len(candidates) <= 1:
+            return candidates[0][0] if candidates else None
+
+        latitude, longitude = properties.get("latitude"), properties.get("longitude")
+        if latitude is None or longitude is None:
+            return candidates[0][0]
+        return min(
+            candidates,
+            key=lambda candidate: float("inf") if candidate[1] is None or candidate[2] is None
+            else float(haversine_km(latitude, longitude, candidate[1], candidate[2])),
+        )[0]
+
+
+def object_vector(obj):
+    """
+    :return: The object's vector or named vectors, None if it has none.
+    """
+    if not obj.vector:
+        return None
+    # Collections without named vectors report their vector under "default"
+    if set(obj.vector) == {"default"}:
+        return obj.vector["default"]
+    return obj.vector
+
+
+def reindex(kind, weaviate_adapter, mariadb_adaptor, args):
+    config = KINDS[kind]
+    alias = config["embedded"]
+
+    source_name = weaviate_adapter.resolve_collection(alias)
+    source = weaviate_adapter.client.collections.get(source_name)
+    target_name = f"{alias}_{time.strftime('%Y%m%d%H%M%S')}"
+
+    schema = source.config.get().to_dict()
+    schema["class"] = target_name
+    schema["properties"] = [prop for prop in schema.get("properties", []) if prop["name"] != config["id_property"]]
+    target = weaviate_adapter.client.collections.create_from_dict(schema)
+    target.config.add_property(
+        Property(
+            name=config["id_property"],
+            data_type=DataType.TEXT,
+            skip_vectorization=True,
+            vectorize_property_name=False,
+        )
+    )
+    logger.info(f"Created {target_name} from {source_name}.")
+
+    matcher = PlaceMatcher(mariadb_adaptor.fetch_place_names(config["table"]), alias)
+    stats = {"copied": 0, "unmatched": 0, "unvectorized": 0}
+
+    def objects():
+        for obj in source.iterator(include_vector=True):
+            vector = object_vector(obj)
+            if vector is None:
+                stats["unvectorized"] += 1
+                logger.warning(f"{alias} object {obj.uuid} ({obj.properties.get('name')}) has no vector.")
+                continue
+
+            place_id = matcher.match(obj.uuid, obj.properties)
+            if place_id is None:
+                stats["unmatched"] += 1
+                logger.warning(f"No MariaDB row for {alias} object {obj.uuid} ({obj.properties.get('name')}).")
+            stats["copied"] += 1
+            yield obj.uuid, {**obj.properties, config["id_property"]: place_id}, vector
+
+    failed = weaviate_adapter.batch_import(
+        target_name, objects(), batch_size=args.batch_size, concurrent_requests=args.concurrency
+    )
+    if failed:
+        weaviate_adapter.client.collections.delete(target_name)
+        raise RuntimeError(f"{len(failed)} objects failed to import into {target_name}: {failed[0].message}")
+
+    if stats["unvectorized"]:
+        # Nothing is re-vectorized, so swapping the alias would serve an index missing these objects
+        weaviate_adapter.client.collections.delete(target_name)
+        raise RuntimeError(f"{stats['unvectorized']} {alias} objects in {source_name} have no vector.")
+
+    count = target.aggregate.over_all(total_count=True).total_count
+    if count != stats["copied"]:
+        weaviate_adapter.client.collections.delete(target_name)
+        raise RuntimeError(f"{target_name} holds {count} objects, expected {stats['copied']}.")
+
+    weaviate_adapter.set_alias(alias, target_name)
+    logger.info(
+        f"{alias} now points at {target_name}: {stats['copied']} objects, {stats['unmatched']} without a MariaDB id."
+    )
+
+    if args.drop_old and source_name != target_name:
+        # Let readers that cached the previous alias move over first
+        time.sleep(float(os.getenv("WEAVIATE_ALIAS_TTL", 60)))
+        weaviate_adapter.client.collections.delete(source_name)
+        logger.info(f"Dropped {source_name}.")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kind", choices=KINDS.keys(), help="reindex one kind only")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=2, help="concurrent Weaviate batch requests")
+    parser.add_argument("--drop-old", action="store_true", help="delete the previous collection after the swap")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    weaviate_adapter = Weaviate_Adapter()
+    with weaviate_adapter.connection(), MariaDB_Adaptor() as mariadb_adaptor:
+        for kind in [args.kind] if args.kind else KINDS:
+            reindex(kind, weaviate_adapter, mariadb_adaptor, args)
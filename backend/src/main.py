@@ -1,4 +1,5 @@
 import logging
+import os
 
 # Third-party imports
 from flask import Flask, jsonify, request
@@ -6,10 +7,20 @@ from flask_cors import CORS
 from flask_socketio import SocketIO
 
 # Local application imports
-from adapters.Weaviate import Weaviate_Adapter
-from adapters.MariaDB import MariaDB_Adaptor
+from adapters.LocalIndex import LocalIndex_Adapter
+from adapters.Weaviate import WEAVIATE_POOL, Weaviate_Adapter
+from adapters.MariaDB import MariaDB_Adaptor, get_pool_status, remove_session
+from adapters.MapBox import MATRIX_SINGLE_FLIGHT
+from adapters.MariaDBWriteBehind import ENRICHMENT_WRITE_BUFFER
 from controllers.streaming_chatbot import StreamingChatbot
+from controllers.ventical_n_day.block_cover import cover_totals
+from common.duration_store import DURATION_STORE
+from common.embeddings import QUERY_EMBEDDING_CACHE
+from common.local_index import LOCAL_INDEX
+from common.lru_cache import DURATION_PAIR_CACHE
 from common.mariadb_schema import Base
+from common.semantic_cache import RECOMMENDATION_CACHE
+from common.stage_timings import RETRIEVAL_TIMINGS
 from common.utils import rename_field
 
 
@@ -36,6 +47,11 @@ def universal_exception_handler(exc):
     logger.error(f"Exception occurred: {type(exc).__name__}: {exc}", exc_info=True)
     return jsonify({"error": f"{type(exc).__name__}: {exc}"}), 500
 
+# Return the request-bound MariaDB session to the shared pool
+@app.teardown_appcontext
+def shutdown_session(exception=None):
+    remove_session()
+
 # Restful api
 # Root endpoint
 @app.route("/", methods=["GET"])
@@ -87,6 +103,51 @@ def fetch_mariadb():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# connection pool statistics of the shared MariaDB engine
+@app.route("/mariadb-pool", methods=["GET"])
+def mariadb_pool():
+    return jsonify(get_pool_status())
+
+# hit/miss statistics of the travel-duration pair cache
+@app.route("/duration-cache", methods=["GET"])
+def duration_cache():
+    return jsonify(DURATION_PAIR_CACHE.stats())
+
+# hit/miss statistics of the recommendation result cache
+@app.route("/recommendation-cache", methods=["GET"])
+def recommendation_cache():
+    return jsonify(RECOMMENDATION_CACHE.stats())
+
+# hit/miss statistics of the query embedding cache
+@app.route("/query-embedding-cache", methods=["GET"])
+def query_embedding_cache():
+    return jsonify(QUERY_EMBEDDING_CACHE.stats())
+
+# per-stage latency of recommendation retrieval
+@app.route("/retrieval-timing", methods=["GET"])
+def retrieval_timing():
+    return jsonify(RETRIEVAL_TIMINGS.stats())
+
+# Weaviate client pool statistics
+@app.route("/weaviate-pool", methods=["GET"])
+def weaviate_pool():
+    return jsonify(WEAVIATE_POOL.stats())
+
+# collections loaded by the in-process retrieval backend
+@app.route("/local-index", methods=["GET"])
+def local_index():
+    return jsonify(LOCAL_INDEX.stats())
+
+# MapBox matrix elements requested vs needed since start-up, and requests answered by an identical one in flight
+@app.route("/mapbox-usage", methods=["GET"])
+def mapbox_usage():
+    return jsonify({**cover_totals(), "shared_requests": MATRIX_SINGLE_FLIGHT.shared})
+
+# state of the memory-mapped duration store
+@app.route("/duration-store", methods=["GET"])
+def duration_store():
+    return jsonify(DURATION_STORE.stats())
+
 # websocket
 @socketio.on('connect')
 def handle_connect():
@@ -99,14 +160,25 @@ def handle_disconnect():
 @socketio.on('message')
 def handle_message(message):
     print(message)
-    for response in streaming_chatbot.response(message.get("text", ""), message.get("payload", {})):
-        socketio.emit("message", response)
+    try:
+        for response in streaming_chatbot.response(message.get("text", ""), message.get("payload", {})):
+            socketio.emit("message", response)
+    finally:
+        remove_session()
 
 if __name__ == "__main__":
     
-    weaviate_adapter = Weaviate_Adapter()
+    # "local" answers recommendations from the exported collections instead of Weaviate
+    if os.getenv("RETRIEVAL_BACKEND", "weaviate").lower() == "local":
+        weaviate_adapter = LocalIndex_Adapter()
+    else:
+        weaviate_adapter = Weaviate_Adapter()
     with MariaDB_Adaptor() as mariadb_adaptor:
         Base.metadata.create_all(mariadb_adaptor.get_engine())
+        mariadb_adaptor.load_place_catalog()
+
+    # Flushes enrichment updates in the background and once more on shutdown
+    ENRICHMENT_WRITE_BUFFER.start()
 
     streaming_chatbot = StreamingChatbot(weaviate_adapter, mariadb_adaptor)
 
@@ -0,0 +1,109 @@
+"""
+Adds precomputed quarter-hour columns and integer place keys.
+
+- Activity/Accommodation: start_q, end_q (SMALLINT) backfilled from start_time/end_time.
+- Place: integer surrogate key for every Activity/Accommodation/Duration place id.
+- Duration: source_key, destination_key (INT) and duration_q (SMALLINT),
+  covered by the ix_duration_keys index used by fetch_durations.
+
+The migration is idempotent and can be re-run safely.
+
+Usage (from the backend directory):
+    python src/migrations/001_quarter_columns_and_place_keys.py
+"""
+import logging
+import os
+import sys
+
+from dotenv import load_dotenv
+from sqlalchemy import text, update
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from adapters.MariaDB import MariaDB_Adaptor
+from common.mariadb_schema import Activity, Accommodation, Place
+from common.utils import transform_time_to_int
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+def add_columns(session):
+    for table in (Activity.__tablename__, Accommodation.__tablename__):
+        session.execute(text(
+            f"ALTER TABLE `{table}` "
+            "ADD COLUMN IF NOT EXISTS start_q SMALLINT NULL AFTER end_time, "
+            "ADD COLUMN IF NOT EXISTS end_q SMALLINT NULL AFTER start_q"
+        ))
+
+    session.execute(text(
+        "ALTER TABLE `Duration` "
+        "ADD COLUMN IF NOT EXISTS source_key INT NULL, "
+        "ADD COLUMN IF NOT EXISTS destination_key INT NULL, "
+        "ADD COLUMN IF NOT EXISTS duration_q SMALLINT NULL"
+    ))
+    session.commit()
+    logger.info("Added start_q/end_q and Duration key columns.")
+
+
+def backfill_quarter_hours(session, table):
+    rows = session.query(table.id, table.start_time, table.end_time).all()
+
+    updates = []
+    for row in rows:
+        start_q, end_q = transform_time_to_int(row.start_time, row.end_time)
+        updates.append({"id": row.id, "start_q": start_q, "end_q": end_q})
+
+    for i in range(0, len(updates), BATCH_SIZE):
+        session.execute(update(table), updates[i:i + BATCH_SIZE])
+    session.commit()
+    logger.info(f"Backfilled start_q/end_q for {len(updates)} rows in {table.__tablename__}.")
+
+
+def create_place_keys(session):
+    Place.__table__.create(session.get_bind(), checkfirst=True)
+
+    session.execute(text(
+        "INSERT IGNORE INTO `Place` (place_id) "
+        "SELECT id FROM `Activity` "
+        "UNION SELECT id FROM `Accommodation` "
+        "UNION SELECT source_id FROM `Duration` "
+        "UNION SELECT destination_id FROM `Duration`"
+    ))
+    session.commit()
+    logger.info("Registered place keys.")
+
+
+def backfill_duration_keys(session):
+    result = session.execute(text(
+        "UPDATE `Duration` d "
+        "JOIN `Place` s ON s.place_id = d.source_id "
+        "JOIN `Place` t ON t.place_id = d.destination_id "
+        "SET d.source_key = s.place_key, "
+        "    d.destination_key = t.place_key, "
+        "    d.duration_q = CEIL(d.duration / 900) "
+        "WHERE d.source_key IS NULL OR d.destination_key IS NULL OR d.duration_q IS NULL"
+    ))
+    session.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_duration_keys "
+        "ON `Duration` (source_key, destination_key, duration_q)"
+    ))
+    session.commit()
+    logger.info(f"Backfilled keys for {result.rowcount} Duration rows.")
+
+
+def main():
+    with MariaDB_Adaptor() as adaptor:
+        session = adaptor.session
+        add_columns(session)
+        backfill_quarter_hours(session, Activity)
+        backfill_quarter_hours(session, Accommodation)
+        create_place_keys(session)
+        backfill_duration_keys(session)
+
+
+if __name__ == "__main__":
+    main()